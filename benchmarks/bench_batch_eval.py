@@ -0,0 +1,59 @@
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lab6"))
+
+from batch import evaluate_batch
+from evaluator import SHAPE_ARITY, compile_node
+from parser import NumberNode, ShapeNode
+from lexer import TokenType
+
+OPERATIONS = [TokenType.AREA, TokenType.PERIMETER, TokenType.SCALE]
+
+
+def generate_shapes(count, seed=0):
+    # Parsed shape statements with the right number of parameters for each shape
+    rng = random.Random(seed)
+    shapes = list(SHAPE_ARITY)
+    nodes = []
+    for _ in range(count):
+        shape_type = rng.choice(shapes)
+        operation = rng.choice(OPERATIONS)
+        arity = SHAPE_ARITY[shape_type] + (operation == TokenType.SCALE)
+        if shape_type == TokenType.TRIANGLE and operation != TokenType.SCALE:
+            # Sides that always form a triangle
+            a, b = rng.uniform(1, 10), rng.uniform(1, 10)
+            values = [a, b, rng.uniform(abs(a - b) + 0.01, a + b - 0.01)]
+        else:
+            values = [round(rng.uniform(0.1, 100), 2) for _ in range(arity)]
+        nodes.append(ShapeNode(shape_type, [NumberNode(value) for value in values], operation))
+    return nodes
+
+
+def closures(nodes):
+    return [compile_node(node)() for node in nodes]
+
+
+def main():
+    sizes = [int(n) for n in sys.argv[1].split(",")] if len(sys.argv) > 1 else [1000, 100000, 1000000]
+    print(f"{'statements':>12} {'closures s':>11} {'batch s':>9} {'speedup':>9}")
+    for size in sizes:
+        nodes = generate_shapes(size)
+        start = time.perf_counter()
+        expected = closures(nodes)
+        closure_time = time.perf_counter() - start
+        start = time.perf_counter()
+        results = evaluate_batch(nodes)
+        batch_time = time.perf_counter() - start
+        for got, want in zip(results, expected):
+            if isinstance(want, tuple):
+                assert all(abs(g - w) <= 1e-9 * max(1, abs(w)) for g, w in zip(got, want))
+            else:
+                assert abs(got - want) <= 1e-9 * max(1, abs(want))
+        print(f"{size:>12} {closure_time:11.3f} {batch_time:9.3f} {closure_time / batch_time:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lab2"))
+
+from lab2 import Grammar, classify_productions
+
+
+def generate_rules(count, seed, multi_char=True):
+    # A right-linear grammar of `count` rules, so every level stays open and
+    # the whole input has to be read
+    rng = random.Random(seed)
+    non_terminals = max(count // 4, 1)
+    rules = []
+    for i in range(count):
+        if multi_char:
+            head = f"X{rng.randrange(non_terminals)}"
+            if rng.random() < 0.2:
+                rules.append(f"{head} → {rng.choice('ab')}")
+            else:
+                rules.append(f"{head} → {rng.choice('ab')} X{rng.randrange(non_terminals)}")
+        else:
+            head = rng.choice("SABCD")
+            rules.append(f"{head} → {rng.choice('ab')}{rng.choice('SABCD')}" if rng.random() < 0.8
+                         else f"{head} → {rng.choice('ab')}")
+    return rules
+
+
+def main():
+    sizes = [int(n) for n in sys.argv[1].split(",")] if len(sys.argv) > 1 else [100_000, 1_000_000, 3_000_000]
+    print(f"{'rules':>10} {'classify s':>11} {'stream s':>9} {'rules/s':>11} {'file s':>8} "
+          f"{'file rules/s':>13} {'early exit s':>13}")
+    with tempfile.TemporaryDirectory() as directory:
+        for count in sizes:
+            # Single-character grammar, which the string-based classify handles
+            rules = generate_rules(count, count, multi_char=False)
+            start = time.perf_counter()
+            expected = Grammar(set("SABCD"), {"a", "b"}, rules).classify()
+            string_based = time.perf_counter() - start
+            start = time.perf_counter()
+            result = classify_productions(rules)
+            stream = time.perf_counter() - start
+            assert result.name == expected, (result, expected)
+
+            # Multi-character grammar streamed from a file
+            rules = generate_rules(count, count)
+            path = os.path.join(directory, f"grammar_{count}.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("\n".join(rules))
+            start = time.perf_counter()
+            with open(path, encoding="utf-8") as f:
+                result = classify_productions(f)
+            from_file = time.perf_counter() - start
+            assert result.level == 3 and result.rules == count
+
+            # The same file with an unrestricted rule near the top: reading
+            # stops there
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("\n".join(["X0 X1 → ε"] + rules))
+            start = time.perf_counter()
+            with open(path, encoding="utf-8") as f:
+                result = classify_productions(f)
+            early = time.perf_counter() - start
+            assert result.level == 0 and result.demoted_by[0] == 1
+
+            print(f"{count:>10} {string_based:11.3f} {stream:9.3f} {count / stream:11.0f} {from_file:8.3f} "
+                  f"{count / from_file:13.0f} {early:13.6f}")
+
+
+if __name__ == "__main__":
+    main()
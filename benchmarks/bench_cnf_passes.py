@@ -0,0 +1,157 @@
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lab5"))
+
+from generators import random_grammar
+from lab5 import GrammarCNFConverter
+
+# The old fixpoint passes rescan every production per round, so they are only
+# timed up to this many productions
+LEGACY_MAX_PRODUCTIONS = 5000
+
+
+def legacy_eliminate_epsilon_productions(g):
+    nullable = set()
+    changed = True
+    while changed:
+        changed = False
+        for A in g.P:
+            for prod in g.P[A]:
+                if all(symbol in nullable or symbol == 'ε' for symbol in prod):
+                    if A not in nullable:
+                        nullable.add(A)
+                        changed = True
+    new_P = defaultdict(list)
+    for A in g.P:
+        for prod in g.P[A]:
+            options = [[]]
+            for symbol in prod:
+                new_options = []
+                for option in options:
+                    if symbol in nullable:
+                        new_options.append(option[:])
+                    new_options.append(option + [symbol])
+                options = new_options
+            for option in options:
+                if option and option != ['ε']:
+                    new_P[A].append(option)
+    g.P = new_P
+
+
+def legacy_eliminate_unit_productions(g):
+    unit_pairs = set()
+    for A in g.P:
+        for prod in g.P[A]:
+            if len(prod) == 1 and prod[0] in g.VN:
+                unit_pairs.add((A, prod[0]))
+    while True:
+        new_pairs = set(unit_pairs)
+        for (A, B) in unit_pairs:
+            for prod in g.P.get(B, []):
+                if len(prod) == 1 and prod[0] in g.VN:
+                    new_pairs.add((A, prod[0]))
+        if new_pairs == unit_pairs:
+            break
+        unit_pairs = new_pairs
+    new_P = defaultdict(list)
+    for A in g.P:
+        for prod in g.P[A]:
+            if not (len(prod) == 1 and prod[0] in g.VN):
+                new_P[A].append(prod)
+    for (A, B) in unit_pairs:
+        for prod in g.P.get(B, []):
+            if not (len(prod) == 1 and prod[0] in g.VN):
+                new_P[A].append(prod)
+    g.P = new_P
+
+
+def legacy_eliminate_non_productive_symbols(g):
+    productive = set()
+    changed = True
+    while changed:
+        changed = False
+        for A in g.P:
+            for prod in g.P[A]:
+                if all(symbol in productive or symbol in g.VT for symbol in prod):
+                    if A not in productive:
+                        productive.add(A)
+                        changed = True
+    g.VN = {A for A in g.VN if A in productive}
+    g.P = {A: [prod for prod in g.P[A] if all(symbol in productive or symbol in g.VT for symbol in prod)]
+           for A in g.VN}
+
+
+def nullable_chain(n):
+    # N0 -> N1 N1, N1 -> N2 N2, ..., Nn -> ε: one new nullable per old round
+    P = {f"N{i}": [[f"N{i + 1}", f"N{i + 1}"], ["a"]] for i in range(n)}
+    P[f"N{n}"] = [["ε"], ["b"]]
+    return GrammarCNFConverter(set(P), {"a", "b"}, P, "N0")
+
+
+def productive_chain(n):
+    # N0 -> a N1, ..., Nn -> b: one new productive symbol per old round
+    P = {f"N{i}": [["a", f"N{i + 1}"], [f"N{i + 1}", f"N{i}"]] for i in range(n)}
+    P[f"N{n}"] = [["b"]]
+    return GrammarCNFConverter(set(P), {"a", "b"}, P, "N0")
+
+
+def unit_forest(n, seed=0):
+    # Short unit chains between random neighbours plus ordinary productions
+    rng = random.Random(seed)
+    P = {}
+    for i in range(n):
+        prods = [["a", f"N{rng.randrange(n)}"], [f"N{rng.randrange(n)}", "b"]]
+        if i + 1 < n and rng.random() < 0.5:
+            prods.append([f"N{i + 1}"])
+        P[f"N{i}"] = prods
+    return GrammarCNFConverter(set(P), {"a", "b"}, P, "N0")
+
+
+def count_productions(g):
+    return sum(len(prods) for prods in g.P.values())
+
+
+CASES = [
+    ("epsilon / chain", nullable_chain, "eliminate_epsilon_productions", legacy_eliminate_epsilon_productions),
+    ("unit / forest", unit_forest, "eliminate_unit_productions", legacy_eliminate_unit_productions),
+    ("productive / chain", productive_chain, "eliminate_non_productive_symbols",
+     legacy_eliminate_non_productive_symbols),
+]
+
+
+def main():
+    sizes = [int(n) for n in sys.argv[1].split(",")] if len(sys.argv) > 1 else [1000, 4000, 25000, 100000]
+    print(f"{'pass / grammar':>20} {'productions':>12} {'worklist s':>11} {'legacy s':>9} {'out':>8} {'legacy out':>11}")
+    for label, build, method, legacy in CASES:
+        for size in sizes:
+            g = build(size // 2)
+            productions = count_productions(g)
+            start = time.perf_counter()
+            getattr(g, method)()
+            elapsed = time.perf_counter() - start
+
+            legacy_time, legacy_out = f"{'skipped':>9}", f"{'-':>11}"
+            if productions <= LEGACY_MAX_PRODUCTIONS:
+                old = build(size // 2)
+                start = time.perf_counter()
+                legacy(old)
+                legacy_time = f"{time.perf_counter() - start:9.3f}"
+                legacy_out = f"{count_productions(old):>11}"
+            print(f"{label:>20} {productions:>12} {elapsed:11.3f} {legacy_time} {count_productions(g):>8} {legacy_out}")
+
+    for size in sizes:
+        g = GrammarCNFConverter(*random_grammar(size))
+        start = time.perf_counter()
+        g.eliminate_epsilon_productions()
+        g.eliminate_unit_productions()
+        g.eliminate_non_productive_symbols()
+        elapsed = time.perf_counter() - start
+        print(f"{'all three / random':>20} {size:>12} {elapsed:11.3f} {'':>9} {count_productions(g):>8}")
+
+
+if __name__ == "__main__":
+    main()
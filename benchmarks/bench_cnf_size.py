@@ -0,0 +1,102 @@
+import copy
+import os
+import random
+import sys
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lab5"))
+
+from generators import random_grammar
+from lab5 import GrammarCNFConverter
+
+
+def legacy_convert_to_cnf(g):
+    # convert_to_cnf before hash-consing: one fresh X chain per long
+    # production and no deduplication (with each chain link under its own head)
+    terminal_map = {}
+    counter = 1
+    new_productions = defaultdict(list)
+    for A in g.P:
+        for prod in g.P[A]:
+            new_prod = []
+            for symbol in prod:
+                if symbol in g.VT and len(prod) > 1:
+                    if symbol not in terminal_map:
+                        new_var = f"T{counter}"
+                        counter += 1
+                        terminal_map[symbol] = new_var
+                        g.VN.add(new_var)
+                        new_productions[new_var].append([symbol])
+                    new_prod.append(terminal_map[symbol])
+                else:
+                    new_prod.append(symbol)
+            new_productions[A].append(new_prod)
+    final_productions = defaultdict(list)
+    for A in new_productions:
+        for prod in new_productions[A]:
+            if len(prod) <= 2:
+                final_productions[A].append(prod)
+            else:
+                curr = prod[0]
+                for _ in range(1, len(prod) - 1):
+                    new_var = f"X{counter}"
+                    counter += 1
+                    g.VN.add(new_var)
+                    final_productions[A if curr == prod[0] else curr].append([curr, new_var])
+                    curr = new_var
+                final_productions[curr].append([curr, prod[-1]])
+    g.P = final_productions
+
+
+def example_grammar():
+    productions = {
+        "S": [["a", "B"], ["b", "A"], ["B"]],
+        "A": [["b"], ["a", "D"], ["A", "S"], ["b", "A", "B"], ["ε"]],
+        "B": [["a"], ["b", "S"]],
+        "C": [["A", "B"]],
+        "D": [["B", "B"]],
+    }
+    return GrammarCNFConverter({"S", "A", "B", "C", "D"}, {"a", "b"}, productions, "S")
+
+
+def shared_suffix_grammar(productions, seed=0):
+    # Long productions built from a small pool of endings, as in grammars that
+    # spell out many statements finishing with the same punctuation/operands
+    rng = random.Random(seed)
+    names = [f"N{i}" for i in range(max(2, productions // 8))]
+    endings = [[rng.choice(names + ["a", "b"]) for _ in range(rng.randint(2, 5))] for _ in range(20)]
+    P = defaultdict(list)
+    for name in names:
+        P[name].append([rng.choice("ab")])
+    for _ in range(productions - len(names)):
+        head = [rng.choice(names + ["a", "b"]) for _ in range(rng.randint(1, 3))]
+        P[rng.choice(names)].append(head + rng.choice(endings))
+    return GrammarCNFConverter(set(names), {"a", "b"}, P, "N0")
+
+
+def size(g):
+    return sum(len(prods) for prods in g.P.values()), len(g.VN)
+
+
+def main():
+    grammars = [("example", example_grammar)]
+    for n in (1000, 10000, 100000):
+        grammars.append((f"random {n}", lambda n=n: GrammarCNFConverter(*random_grammar(n))))
+        grammars.append((f"shared suffix {n}", lambda n=n: shared_suffix_grammar(n)))
+
+    print(f"{'grammar':>20} {'legacy P':>9} {'legacy VN':>10} {'shared P':>8} {'shared VN':>9} {'shrink':>7}")
+    for label, build in grammars:
+        g = build()
+        g.eliminate_epsilon_productions()
+        g.eliminate_unit_productions()
+        g.eliminate_non_productive_symbols()
+        g.eliminate_inaccessible_symbols()
+        old = copy.deepcopy(g)
+        legacy_convert_to_cnf(old)
+        g.convert_to_cnf()
+        (old_p, old_vn), (new_p, new_vn) = size(old), size(g)
+        print(f"{label:>20} {old_p:>9} {old_vn:>10} {new_p:>8} {new_vn:>9} {old_p / new_p:6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
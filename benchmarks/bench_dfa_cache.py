@@ -0,0 +1,55 @@
+import os
+import random
+import sys
+import tempfile
+import time
+from multiprocessing import Pool
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lab2"))
+
+from generators import nth_from_last_nfa
+from lab2 import DFA, DFACache, FiniteAutomaton
+
+
+def _worker_load(args):
+    # A worker process starting up: map the cached DFA and run 1000 words
+    path, words = args
+    start = time.perf_counter()
+    dfa = DFA.load(path)
+    accepted = sum(map(dfa.accepts, words))
+    return time.perf_counter() - start, accepted
+
+
+def main():
+    sizes = [int(n) for n in sys.argv[1].split(",")] if len(sys.argv) > 1 else [8, 12, 16, 17]
+    workers = 4
+    print(f"{'n':>4} {'dfa states':>11} {'file KB':>9} {'build s':>9} {'cached load s':>14} "
+          f"{'speedup':>9} {'worker s':>14}")
+    with tempfile.TemporaryDirectory() as directory:
+        cache = DFACache(directory)
+        for n in sizes:
+            fa = FiniteAutomaton(*nth_from_last_nfa(n))
+            start = time.perf_counter()
+            built = fa.convert_ndfa_to_dfa_cached(cache)
+            build = time.perf_counter() - start
+            start = time.perf_counter()
+            loaded = fa.convert_ndfa_to_dfa_cached(cache)
+            load = time.perf_counter() - start
+
+            rng = random.Random(n)
+            words = ["".join(rng.choice("ab") for _ in range(rng.randint(n, 3 * n))) for _ in range(1000)]
+            expected = sum(map(built.accepts, words))
+            assert sum(map(loaded.accepts, words)) == expected
+
+            path = cache.path(fa.cache_key())
+            with Pool(workers) as pool:
+                results = pool.map(_worker_load, [(path, words)] * workers)
+            assert all(accepted == expected for _, accepted in results)
+            worker = max(elapsed for elapsed, _ in results)
+
+            print(f"{n:>4} {built.num_states:>11} {os.path.getsize(path) / 1024:9.1f} {build:9.3f} "
+                  f"{load:14.5f} {build / load:8.0f}x {worker:14.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import os
+import sys
+import time
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lab2"))
+
+from generators import nth_from_last_regex, random_words, thompson_nfa
+from lab2 import DEAD, DFA, EPSILON, FiniteAutomaton
+
+
+def legacy_epsilon_dfa(fa):
+    # Textbook ε-NFA subset construction: the ε-closure of every new subset
+    # is found again by a graph search, with no sharing between subsets
+    def closure(states):
+        seen = set(states)
+        stack = list(states)
+        while stack:
+            state = stack.pop()
+            for next_state in fa.transitions.get(state, {}).get(EPSILON, []):
+                if next_state not in seen:
+                    seen.add(next_state)
+                    stack.append(next_state)
+        return frozenset(seen)
+
+    alphabet = [symbol for symbol in fa.alphabet if symbol != EPSILON]
+    start = closure([fa.start_state])
+    ids = {start: 0}
+    order = [start]
+    table = []
+    for subset in order:
+        row = []
+        for symbol in alphabet:
+            moved = {next_state for state in subset for next_state in fa.transitions.get(state, {}).get(symbol, [])}
+            if not moved:
+                row.append(None)
+                continue
+            target = closure(moved)
+            if target not in ids:
+                ids[target] = len(order)
+                order.append(target)
+            row.append(ids[target])
+        table.append(row)
+    return order, table
+
+
+def nested_stars(depth):
+    # ((...(a*)*...)*)b: every level adds an ε-cycle around the one inside
+    node = ("sym", "a")
+    for _ in range(depth):
+        node = ("star", node)
+    return ("cat", node, ("sym", "b"))
+
+
+def main():
+    chain = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    print(f"{'NFA':>18} {'states':>7} {'ε-moves':>8} {'DFA states':>11} {'legacy states':>14} "
+          f"{'closures s':>11} {'ε-DFA s':>9} {'legacy s':>9} {'speedup':>8}")
+    cases = [(f"nth-from-last {n}", nth_from_last_regex(n)) for n in (4, 8, 10)]
+    # The nested stars have a 2-state DFA, so the legacy construction closes
+    # only three subsets, while compile() numbers and closes the whole NFA
+    # once. Both are linear in the NFA and take about a millisecond, and the
+    # speedup stays around 0.8x at every depth. That upfront work is what
+    # the nth-from-last rows get back once there are more than a handful of
+    # DFA states.
+    cases += [(f"nested stars {d}", nested_stars(d)) for d in (10, 50, 200)]
+    for label, node in cases:
+        states, alphabet, transitions, start, finals = thompson_nfa(node, chain)
+        moves = sum(len(row.get(EPSILON, ())) for row in transitions.values())
+
+        # Best of a few runs, on a fresh automaton each time: the small cases
+        # take well under a millisecond
+        compiled = elapsed = legacy = float("inf")
+        for _ in range(5):
+            fa = FiniteAutomaton(states, alphabet, transitions, start, finals)
+            begin = time.perf_counter()
+            fa.compile()
+            compiled = min(compiled, time.perf_counter() - begin)
+            dfa = fa.convert_ndfa_to_dfa()
+            elapsed = min(elapsed, time.perf_counter() - begin)
+
+            begin = time.perf_counter()
+            order, table = legacy_epsilon_dfa(FiniteAutomaton(states, alphabet, transitions, start, finals))
+            legacy = min(legacy, time.perf_counter() - begin)
+
+        # Same language: both DFAs minimize to the same size and agree on
+        # random words. The ε-DFA can have fewer states, as subsets differing
+        # only in ε-chain states are one state there.
+        finals_set = set(finals)
+        legacy_dfa = DFA(dfa.alphabet, array("i", [DEAD if target is None else target for row in table for target in row]),
+                         bytearray(bool(subset & finals_set) for subset in order))
+        assert dfa.minimize().num_states == legacy_dfa.minimize().num_states
+        for word in random_words(500, len(states), alphabet="".join(alphabet), max_length=24):
+            assert dfa.accepts(word) == legacy_dfa.accepts(word)
+
+        print(f"{label:>18} {len(states):>7} {moves:>8} {dfa.num_states:>11} {len(order):>14} {compiled:11.4f} "
+              f"{elapsed:9.4f} {legacy:9.4f} {legacy / elapsed:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+for lab in ("lab1", "lab2", "lab5", "lab6"):
+    sys.path.insert(0, os.path.join(ROOT, lab))
+
+import lab1
+import lab2
+import lab5
+import lexer
+from generators import generate_statements, nth_from_last_nfa, random_grammar, random_words
+from instrumentation import Instrumentation
+from suite import lab1_automaton
+
+
+def main():
+    # One instrumented run over the suite's workloads, dumped as JSON to the
+    # given path or to stdout
+    nfa = lab1_automaton(nth_from_last_nfa(8))
+    words = random_words(500, 0, min_length=64, max_length=64)
+    fa = lab2.FiniteAutomaton(*nth_from_last_nfa(12))
+    converter = lab5.GrammarCNFConverter(*random_grammar(4000))
+    text = generate_statements(256 << 10)
+
+    with Instrumentation(lab1, lab2, lab5, lexer, memory=True) as run:
+        nfa.accepts_many(words)
+        fa.convert_ndfa_to_dfa().minimize()
+        converter.convert()
+        lexer.Lexer(text).tokenize()
+
+    if len(sys.argv) > 1:
+        run.dump(sys.argv[1])
+    else:
+        run.dump(sys.stdout)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lab6"))
+
+from generators import generate_statements, parse_size
+from lexer import Lexer, Token, TokenType, convert_value
+
+# The old per-pattern tokenizer copies the rest of the input for every token,
+# so it is only timed on inputs up to this size
+LEGACY_MAX_BYTES = 128 * 1024
+
+
+def legacy_tokenize(lexer):
+    # The tokenizer as it was before the single-pass scanner, kept for comparison
+    tokens = []
+    pos = 0
+    while pos < len(lexer.text):
+        match = re.match(r'[ \t\n:]+', lexer.text[pos:])
+        if match:
+            pos += match.end()
+            continue
+        matched = False
+        for token_type, pattern in lexer.patterns:
+            regex = re.compile(pattern)
+            match = regex.match(lexer.text[pos:])
+            if match:
+                tokens.append(Token(token_type, convert_value(token_type, match.group(0))))
+                pos += match.end()
+                matched = True
+                break
+        if not matched:
+            raise ValueError(f"Invalid token at position {pos}: '{lexer.text[pos:]}'")
+    return tokens
+
+
+def time_call(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    sizes = sys.argv[1] if len(sys.argv) > 1 else "1K,1M,100M"
+    print(f"{'size':>10} {'tokens':>10} {'scanner MB/s':>14} {'legacy MB/s':>13} {'speedup':>9}")
+    for label in sizes.split(","):
+        text = generate_statements(parse_size(label))
+        megabytes = len(text) / 1024 ** 2
+
+        elapsed, tokens = time_call(Lexer(text).tokenize)
+        scanner_rate = megabytes / elapsed
+        count = len(tokens)
+        del tokens
+
+        legacy_rate = None
+        if len(text) <= LEGACY_MAX_BYTES:
+            legacy_elapsed, legacy_tokens = time_call(legacy_tokenize, Lexer(text))
+            expected = Lexer(text).tokenize()
+            assert [(t.type, t.value) for t in legacy_tokens] == [(t.type, t.value) for t in expected]
+            legacy_rate = megabytes / legacy_elapsed
+
+        legacy_text = f"{legacy_rate:13.3f}" if legacy_rate else f"{'skipped':>13}"
+        speedup = f"{scanner_rate / legacy_rate:8.1f}x" if legacy_rate else f"{'-':>9}"
+        print(f"{label:>10} {count:>10} {scanner_rate:14.3f} {legacy_text} {speedup}")
+
+
+if __name__ == "__main__":
+    main()
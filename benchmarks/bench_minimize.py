@@ -0,0 +1,69 @@
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lab2"))
+
+from generators import chain_nfa, random_nfa
+from lab2 import DEAD, FiniteAutomaton
+
+
+def moore_minimal_size(dfa):
+    # Naive Moore refinement on the sink-completed DFA: recompute every
+    # state's (class, successor classes) signature until nothing splits
+    n, width = dfa.num_states, dfa.width
+    sink = n
+    delta = [[sink] * width for _ in range(n + 1)]
+    for state in range(n):
+        for column in range(width):
+            next_state = dfa.table[state * width + column]
+            if next_state != DEAD:
+                delta[state][column] = next_state
+    classes = [dfa.accepting[state] for state in range(n)] + [0]
+    count = len(set(classes))
+    while True:
+        signatures = {}
+        new_classes = [
+            signatures.setdefault((classes[q], *(classes[t] for t in delta[q])), len(signatures))
+            for q in range(n + 1)
+        ]
+        if len(signatures) == count:
+            break
+        classes, count = new_classes, len(signatures)
+    if classes[0] == classes[sink]:
+        return 1
+    return count - 1
+
+
+def compare(label, dfa):
+    start = time.perf_counter()
+    minimal = dfa.minimize()
+    hopcroft_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    moore_size = moore_minimal_size(dfa)
+    moore_time = time.perf_counter() - start
+
+    assert minimal.num_states == moore_size, (minimal.num_states, moore_size)
+    rng = random.Random(dfa.num_states)
+    for _ in range(200):
+        string = "".join(rng.choice("ab") for _ in range(rng.randint(0, 30)))
+        assert minimal.accepts(string) == dfa.accepts(string)
+    print(f"{label:>10} {dfa.num_states:>11} {minimal.num_states:>8} {hopcroft_time:11.3f} "
+          f"{moore_time:9.3f} {moore_time / hopcroft_time:7.1f}x")
+
+
+def main():
+    max_states = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    print(f"{'NFA':>10} {'DFA states':>11} {'minimal':>8} {'hopcroft s':>11} {'moore s':>9} {'speedup':>8}")
+    for n in range(8, 57, 4):
+        dfa = FiniteAutomaton(*random_nfa(n, seed=n)).convert_ndfa_to_dfa()
+        if dfa.num_states <= max_states:
+            compare(f"random {n}", dfa)
+    for n in (500, 1000, 2000, 4000):
+        compare(f"chain {n}", FiniteAutomaton(*chain_nfa(n)).convert_ndfa_to_dfa())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lab6"))
+
+from generators import generate_statements, parse_size
+from parallel import _parse_chunk, _unpack, parse_parallel, split_statements
+from parser import Lexer, Parser
+
+
+def main():
+    sizes = sys.argv[1] if len(sys.argv) > 1 else "1M,10M"
+    process_counts = [int(n) for n in sys.argv[2].split(",")] if len(sys.argv) > 2 else [1, 2, 4, os.cpu_count()]
+    print(f"cpus: {os.cpu_count()}")
+    print(f"{'size':>8} {'processes':>10} {'seconds':>9} {'speedup':>9}")
+    for label in sizes.split(","):
+        text = generate_statements(parse_size(label))
+        start = time.perf_counter()
+        expected = Parser(Lexer(text).tokenize()).parse()
+        sequential = time.perf_counter() - start
+        print(f"{label:>8} {'sequential':>10} {sequential:9.2f} {1:8.2f}x")
+        expected = [(repr(node), node.start, node.end) for node in expected]
+
+        # The parent's serial share: unpacking what the workers send back.
+        # However many cores there are, the speedup stays below
+        # sequential / parent
+        chunks = [_parse_chunk((text[start:end], start)) for start, end in split_statements(text)]
+        start = time.perf_counter()
+        for columns in chunks:
+            _unpack(columns)
+        parent = time.perf_counter() - start
+        print(f"{label:>8} {'parent':>10} {parent:9.2f} {sequential / parent:8.2f}x ceiling")
+
+        for processes in sorted(set(process_counts)):
+            start = time.perf_counter()
+            nodes = parse_parallel(text, processes)
+            elapsed = time.perf_counter() - start
+            assert [(repr(node), node.start, node.end) for node in nodes] == expected
+            print(f"{label:>8} {processes:>10} {elapsed:9.2f} {sequential / elapsed:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lab4"))
+
+from lab4 import compile_regex
+
+
+def to_python_re(nodes):
+    # The same plan written in Python's regex dialect
+    parts = []
+    for node in nodes:
+        kind = node[0]
+        if kind == "lit":
+            parts.append(re.escape(node[1]))
+        elif kind == "group":
+            parts.append(f"(?:{to_python_re(node[1])})")
+        elif kind == "alt":
+            options = [to_python_re([node[1]])] + [re.escape(option) for option in node[2]]
+            parts.append(f"(?:{'|'.join(options)})")
+        else:
+            inner = f"(?:{to_python_re([node[1]])})"
+            suffix = {"star": "*", "plus": "+", "opt": "?"}.get(kind) or f"{{{node[2]}}}"
+            parts.append(inner + suffix)
+    return "".join(parts)
+
+
+# Pathological families: (regex in the lab4 dialect, input) for a size n
+FAMILIES = {
+    "(a|a)^n on a^n b": lambda n: (f"(a|a)^{n}", "a" * n + "b"),
+    "(a?)^n a^n on a^n": lambda n: (f"(a?)^{n}a^{n}", "a" * n),
+}
+
+
+def time_call(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    sizes = [int(n) for n in sys.argv[1].split(",")] if len(sys.argv) > 1 else [10, 14, 18, 20, 22, 30]
+    # Backtracking time doubles with every step of n, so `re` stops here
+    re_max = 22
+    print(f"{'family':>20} {'n':>3} {'lab4 ms':>9} {'re ms':>11} {'agree':>6}")
+    for family, build in FAMILIES.items():
+        for n in sizes:
+            regex, text = build(n)
+            compiled = compile_regex(regex)
+            nfa_time, nfa_result = time_call(compiled.matches, text)
+            if n <= re_max:
+                pattern = re.compile(to_python_re(compiled.plan))
+                re_time, re_result = time_call(pattern.fullmatch, text)
+                re_text = f"{re_time * 1000:11.2f}"
+                agree = str(nfa_result == (re_result is not None))
+            else:
+                re_text, agree = f"{'skipped':>11}", "-"
+            print(f"{family:>20} {n:>3} {nfa_time * 1000:9.2f} {re_text} {agree:>6}")
+
+    # Throughput of matching many strings against one compiled regex
+    compiled = compile_regex("M?N^2(O|P)^3Q*R+")
+    strings = compiled.sample(100000, seed=0)
+    elapsed, results = time_call(compiled.match_many, strings)
+    assert all(results)
+    print(f"match_many: {len(strings) / elapsed:,.0f} strings/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lab6"))
+
+from generators import generate_statements, parse_size
+from lexer import IncrementalLexer, Lexer
+
+# Edits that keep the document valid: (text to insert, characters to delete)
+EDITS = [(" 7", 0), (" 3.25", 0), ("\nsquare: 4 area=?", 0), (" ", 1), ("", 0)]
+
+
+def random_edit(lexer, rng):
+    # An edit at a random token boundary, so the document always still lexes
+    offset = rng.randrange(lexer.length)
+    token = lexer.tokens_between(offset, offset + 1)
+    offset = token[0].end if token else offset
+    inserted, deleted = rng.choice(EDITS)
+    if deleted and lexer.text_slice(offset, offset + deleted) != " ":
+        deleted = 0
+    return offset, deleted, inserted
+
+
+def main():
+    sizes = sys.argv[1] if len(sys.argv) > 1 else "100K,1M,10M"
+    edits_per_size = 200
+    print(f"{'size':>8} {'full tokenize s':>16} {'edit ms (mean)':>15} {'edit ms (max)':>14} {'verified':>9}")
+    for label in sizes.split(","):
+        text = generate_statements(parse_size(label))
+        start = time.perf_counter()
+        Lexer(text).tokenize()
+        full = time.perf_counter() - start
+
+        lexer = IncrementalLexer(text)
+        rng = random.Random(0)
+        timings = []
+        for _ in range(edits_per_size):
+            offset, deleted, inserted = random_edit(lexer, rng)
+            start = time.perf_counter()
+            lexer.edit(offset, deleted, inserted)
+            timings.append(time.perf_counter() - start)
+
+        expected = [(t.type, t.value, t.start, t.end) for t in Lexer(lexer.text).tokenize()]
+        verified = [(t.type, t.value, t.start, t.end) for t in lexer.tokens()] == expected
+        print(f"{label:>8} {full:16.3f} {1000 * sum(timings) / len(timings):15.3f} "
+              f"{1000 * max(timings):14.3f} {str(verified):>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lab2"))
+
+from generators import nth_from_last_nfa
+from lab2 import FiniteAutomaton
+
+
+def main():
+    max_n = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    print(f"{'n':>3} {'NFA states':>11} {'DFA states':>11} {'seconds':>9} {'states/s':>10}")
+    for n in range(4, max_n + 1, 2):
+        fa = FiniteAutomaton(*nth_from_last_nfa(n))
+        start = time.perf_counter()
+        dfa = fa.convert_ndfa_to_dfa()
+        elapsed = time.perf_counter() - start
+        assert dfa.num_states == 2 ** (n + 1)
+        assert dfa.accepts("b" + "a" + "b" * n) and not dfa.accepts("b" * (n + 1))
+        print(f"{n:>3} {n + 2:>11} {dfa.num_states:>11} {elapsed:9.3f} {dfa.num_states / elapsed:10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lab6"))
+
+from generators import generate_statements, parse_size
+from lexer import Lexer
+from lexgen import TableLexer
+
+
+def best_of(runs, func, *args):
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    sizes = sys.argv[1] if len(sys.argv) > 1 else "64K,1M,10M"
+    runs = 3
+    start = time.perf_counter()
+    table_lexer = TableLexer()
+    build = time.perf_counter() - start
+    print(f"table: {table_lexer.dfa.num_states} DFA states, {table_lexer.width} character classes, "
+          f"built in {build * 1000:.1f} ms")
+    print(f"{'size':>8} {'tokens':>10} {'regex MB/s':>11} {'table MB/s':>11} {'speedup':>9}")
+    for label in sizes.split(","):
+        text = generate_statements(parse_size(label))
+        megabytes = len(text) / 1024 ** 2
+        regex_time, expected = best_of(runs, lambda: Lexer(text).tokenize())
+        table_time, tokens = best_of(runs, table_lexer.tokenize, text)
+        assert [(t.type, t.value, t.start, t.end) for t in tokens] == \
+            [(t.type, t.value, t.start, t.end) for t in expected]
+        print(f"{label:>8} {len(tokens):>10} {megabytes / regex_time:11.3f} {megabytes / table_time:11.3f} "
+              f"{regex_time / table_time:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lab6"))
+
+from generators import generate_statements, parse_size
+from lexer import Lexer
+from parser import Parser
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def resident_bytes():
+    # Current resident set size (Linux)
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * PAGE_SIZE
+
+
+def measure(build):
+    # Seconds to build, resident bytes the result holds on to, and the result
+    gc.collect()
+    before = resident_bytes()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    return elapsed, resident_bytes() - before, result
+
+
+def main():
+    sizes = sys.argv[1] if len(sys.argv) > 1 else "1M,10M,100M"
+    print(f"{'size':>8} {'tokens':>10} {'list s':>8} {'list MB':>9} {'buffer s':>9} {'buffer MB':>10} "
+          f"{'memory':>7} {'parse list s':>13} {'parse buffer s':>15}")
+    for label in sizes.split(","):
+        text = generate_statements(parse_size(label))
+        lexer = Lexer(text)
+
+        buffer_time, buffer_bytes, buffer = measure(lexer.tokenize_compact)
+        count = len(buffer)
+        start = time.perf_counter()
+        buffer_nodes = len(Parser(buffer).parse())
+        parse_buffer_time = time.perf_counter() - start
+        del buffer
+
+        list_time, list_bytes, tokens = measure(lexer.tokenize)
+        start = time.perf_counter()
+        list_nodes = len(Parser(tokens).parse())
+        parse_list_time = time.perf_counter() - start
+        assert len(tokens) == count and list_nodes == buffer_nodes
+        del tokens
+
+        mb = 1024 ** 2
+        print(f"{label:>8} {count:>10} {list_time:8.2f} {list_bytes / mb:9.1f} {buffer_time:9.2f} "
+              f"{buffer_bytes / mb:10.1f} {list_bytes / max(buffer_bytes, 1):6.1f}x "
+              f"{parse_list_time:13.2f} {parse_buffer_time:15.2f}")
+
+
+if __name__ == "__main__":
+    main()
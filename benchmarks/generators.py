@@ -0,0 +1,184 @@
+import random
+from collections import defaultdict
+
+# Seeded workload generators shared by the benchmarks. They return plain data
+# rather than lab objects, so every lab can build its own:
+#   automata  (states, alphabet, transitions, start, finals), with transitions
+#             as {state: {symbol: [next states]}} like lab2.FiniteAutomaton
+#   grammars  (non-terminals, terminals, {head: [[symbol, ...], ...]}, start)
+#             like lab5.GrammarCNFConverter
+#   text      regexes in lab4 syntax, shape statements for lab6
+
+SHAPES = ["rectangle", "square", "circle", "triangle", "pentagon", "trapezoid"]
+OPERATIONS = ["area", "perimeter", "scale"]
+FUNCTIONS = ["sin", "cos", "tan", "cotan", "log", "pow", "sqrt"]
+
+
+def parse_size(text):
+    units = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+    text = text.strip().upper()
+    if text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def nth_from_last_nfa(n):
+    # NFA for (a|b)*a(a|b)^n: n + 2 states, but its DFA has 2^(n+1) states
+    states = [f"q{i}" for i in range(n + 2)]
+    transitions = {"q0": {"a": ["q0", "q1"], "b": ["q0"]}}
+    for i in range(1, n + 1):
+        transitions[f"q{i}"] = {"a": [f"q{i + 1}"], "b": [f"q{i + 1}"]}
+    return states, ["a", "b"], transitions, "q0", [f"q{n + 1}"]
+
+
+def random_nfa(n, seed, alphabet="ab", density=1.1, final_ratio=0.3):
+    # Every state gets int(density) successors per symbol, plus one more with
+    # probability density % 1; around 1.1 the DFAs grow to tens of thousands
+    # of states by n = 56
+    rng = random.Random(seed)
+    states = [f"q{i}" for i in range(n)]
+    transitions = {}
+    for state in states:
+        for symbol in alphabet:
+            targets = rng.sample(states, min(n, int(density) + (rng.random() < density % 1)))
+            if targets:
+                transitions.setdefault(state, {})[symbol] = targets
+    finals = [state for state in states if rng.random() < final_ratio] or [states[-1]]
+    return states, list(alphabet), transitions, states[0], finals
+
+
+def chain_nfa(n):
+    # a^n(a|b)*: already minimal, but Moore needs n rounds to prove it
+    states = [f"q{i}" for i in range(n + 1)]
+    transitions = {f"q{i}": {"a": [f"q{i + 1}"]} for i in range(n)}
+    transitions[f"q{n}"] = {"a": [f"q{n}"], "b": [f"q{n}"]}
+    return states, ["a", "b"], transitions, "q0", [f"q{n}"]
+
+
+def random_words(count, seed, alphabet="ab", min_length=0, max_length=32):
+    rng = random.Random(seed)
+    return ["".join(rng.choices(alphabet, k=rng.randint(min_length, max_length))) for _ in range(count)]
+
+
+def random_grammar(productions, seed=0):
+    # Random CFG over ~productions/4 non-terminals with a few ε and unit
+    # productions. They are kept rare on purpose: a dense unit graph makes the
+    # output itself quadratic, whatever the algorithm.
+    rng = random.Random(seed)
+    names = [f"N{i}" for i in range(max(2, productions // 4))]
+    P = defaultdict(list)
+    for name in names:
+        P[name].append([rng.choice("ab")])
+    for _ in range(productions - len(names)):
+        roll = rng.random()
+        if roll < 0.01:
+            prod = ["ε"]
+        elif roll < 0.03:
+            prod = [rng.choice(names)]
+        else:
+            prod = [rng.choice(names) if rng.random() < 0.5 else rng.choice("ab")
+                    for _ in range(rng.randint(2, 4))]
+        P[rng.choice(names)].append(prod)
+    return set(names), {"a", "b"}, P, "N0"
+
+
+def random_regex(pieces, seed=0, alphabet="abcdefgh"):
+    # A regex in the syntax lab4 understands: literals, groups, *, +, ?,
+    # ^n and alternatives of literals inside a group, e.g. "a(bc)*(d|ef)^2"
+    rng = random.Random(seed)
+    parts = []
+    for _ in range(pieces):
+        roll = rng.random()
+        if roll < 0.3:
+            piece = rng.choice(alphabet)
+        elif roll < 0.5:
+            piece = "(" + "".join(rng.choices(alphabet, k=rng.randint(2, 4))) + ")"
+        else:
+            options = ["".join(rng.choices(alphabet, k=rng.randint(1, 3))) for _ in range(rng.randint(2, 4))]
+            piece = "(" + "|".join(options) + ")"
+        roll = rng.random()
+        if roll < 0.2:
+            piece += rng.choice("*+?")
+        elif roll < 0.3:
+            piece += f"^{rng.randint(2, 4)}"
+        parts.append(piece)
+    return "".join(parts)
+
+
+def generate_statements(size, seed=0):
+    # Build a corpus of shape statements and function calls of about `size` characters
+    rng = random.Random(seed)
+    lines = []
+    length = 0
+    while length < size:
+        if rng.random() < 0.8:
+            params = " ".join(
+                f"{rng.uniform(0.1, 100):.2f}" if rng.random() < 0.5 else str(rng.randint(1, 100))
+                for _ in range(rng.randint(1, 3))
+            )
+            line = f"{rng.choice(SHAPES)}: {params} {rng.choice(OPERATIONS)}=?"
+        else:
+            line = f"{rng.choice(FUNCTIONS)}({rng.randint(0, 360)})"
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines)
+
+
+def thompson_nfa(node, chain=0):
+    # Thompson's construction for a regex tree of ('sym', c), ('cat', a, b),
+    # ('alt', a, b), ('star', a) and ('opt', a), with ε-moves as 'ε'.
+    # `chain` extra ε-states are put between the parts of every
+    # concatenation, to make the ε-chains as long as wanted.
+    transitions = defaultdict(lambda: defaultdict(list))
+    count = 0
+
+    def new():
+        nonlocal count
+        count += 1
+        return f"s{count - 1}"
+
+    def link(source, target, symbol="ε"):
+        transitions[source][symbol].append(target)
+
+    def build(node):
+        # (entry, exit) of the fragment
+        kind = node[0]
+        if kind == "sym":
+            entry, exit = new(), new()
+            link(entry, exit, node[1])
+        elif kind == "cat":
+            entry, middle = build(node[1])
+            for _ in range(chain):
+                step = new()
+                link(middle, step)
+                middle = step
+            start, exit = build(node[2])
+            link(middle, start)
+        else:
+            entry, exit = new(), new()
+            inner_entry, inner_exit = build(node[1])
+            link(entry, inner_entry)
+            link(inner_exit, exit)
+            if kind == "alt":
+                other_entry, other_exit = build(node[2])
+                link(entry, other_entry)
+                link(other_exit, exit)
+            else:
+                link(entry, exit)
+                if kind == "star":
+                    link(inner_exit, inner_entry)
+        return entry, exit
+
+    start, final = build(node)
+    states = [f"s{i}" for i in range(count)]
+    alphabet = sorted({symbol for row in transitions.values() for symbol in row} - {"ε"})
+    return states, alphabet, {state: dict(row) for state, row in transitions.items()}, start, [final]
+
+
+def nth_from_last_regex(n):
+    # (a|b)*a(a|b)^n as a regex tree for thompson_nfa
+    either = ("alt", ("sym", "a"), ("sym", "b"))
+    node = ("cat", ("star", either), ("sym", "a"))
+    for _ in range(n):
+        node = ("cat", node, either)
+    return node
@@ -0,0 +1,181 @@
+import argparse
+import datetime
+import gc
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+for lab in ("lab1", "lab2", "lab4", "lab5", "lab6"):
+    sys.path.insert(0, os.path.join(ROOT, lab))
+
+import lab1
+import lab2
+import lab4
+from generators import (generate_statements, nth_from_last_nfa, random_grammar, random_nfa, random_regex,
+                        random_words)
+from lab5 import GrammarCNFConverter
+from lexer import Lexer
+
+# Scaling runs of the engine behind every lab on seeded synthetic input.
+# Every (case, size) is timed a few times on fresh input and the results are
+# written as JSON, which a later run can be compared against:
+#
+#   python suite.py --output results.json
+#   python suite.py --baseline results.json        # compare, exit 1 on regressions
+#   python suite.py --output baseline.json         # refresh the stored baseline
+#
+# Timings only compare on the same machine, so refresh BASELINE there first.
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def lab1_automaton(spec):
+    # lab1 keys its transitions by (state, symbol)
+    states, alphabet, transitions, start, finals = spec
+    moves = {(state, symbol): set(targets)
+             for state, row in transitions.items() for symbol, targets in row.items()}
+    return lab1.FiniteAutomaton(states, alphabet, moves, start, finals)
+
+
+def accepts_case(length, seed):
+    fa = lab1_automaton(nth_from_last_nfa(8))
+    words = random_words(500, seed, min_length=length, max_length=length)
+    return lambda: [fa.accepts(word) for word in words]
+
+
+def subset_case(make_spec):
+    def setup(size, seed):
+        fa = lab2.FiniteAutomaton(*make_spec(size, seed))
+        return fa.convert_ndfa_to_dfa
+    return setup
+
+
+def cnf_case(productions, seed):
+    converter = GrammarCNFConverter(*random_grammar(productions, seed))
+    return converter.convert
+
+
+def regex_case(pieces, seed):
+    regex = random_regex(pieces, seed)
+
+    def run():
+        lab4.compile_regex.cache_clear()
+        return [lab4.generate_strings_from_regex(regex) for _ in range(1000)]
+    return run
+
+
+def tokenize_case(size, seed):
+    text = generate_statements(size, seed)
+    return lambda: Lexer(text).tokenize()
+
+
+# name -> (setup(size, seed) returning the call to time, sizes, quick sizes)
+CASES = {
+    "lab1.accepts/nth_from_last": (accepts_case, [16, 64, 256, 1024], [16, 256]),
+    "lab2.subset/nth_from_last": (subset_case(lambda n, seed: nth_from_last_nfa(n)), [8, 10, 12, 14], [8, 12]),
+    "lab2.subset/random_nfa": (subset_case(random_nfa), [16, 24, 32, 40], [16, 32]),
+    "lab4.generate/random_regex": (regex_case, [4, 16, 64, 256], [4, 64]),
+    "lab5.convert/random_cfg": (cnf_case, [1000, 4000, 16000], [1000, 4000]),
+    "lab6.tokenize/statements": (tokenize_case, [16 << 10, 64 << 10, 256 << 10, 1 << 20], [16 << 10, 256 << 10]),
+}
+
+
+def measure(setup, size, seed, repeat):
+    times = []
+    for _ in range(repeat):
+        run = setup(size, seed)
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return {"size": size, "best": min(times), "median": statistics.median(times)}
+
+
+def run_suite(names, quick=False, repeat=5, seed=0, report=print):
+    results = {}
+    for name in names:
+        setup, sizes, quick_sizes = CASES[name]
+        points = results[name] = []
+        for size in quick_sizes if quick else sizes:
+            point = measure(setup, size, seed, repeat)
+            # Local growth order: time ~ size^slope between consecutive sizes
+            if points:
+                previous = points[-1]
+                point["slope"] = (math.log(point["best"] / previous["best"]) /
+                                  math.log(size / previous["size"]))
+            points.append(point)
+            slope = f"{point['slope']:6.2f}" if "slope" in point else f"{'':>6}"
+            report(f"{name:<28} {size:>9} {point['best']:10.5f} {point['median']:10.5f} {slope}")
+    return results
+
+
+def compare(results, baseline, threshold, report=print):
+    # Best times against the baseline's; returns the (case, size) pairs that
+    # got slower by more than `threshold`
+    regressions = []
+    report(f"\n{'case':<28} {'size':>9} {'baseline s':>10} {'now s':>10} {'ratio':>7}")
+    for name, points in results.items():
+        old = {point["size"]: point["best"] for point in baseline["results"].get(name, [])}
+        for point in points:
+            if point["size"] not in old:
+                continue
+            ratio = point["best"] / old[point["size"]]
+            flag = "  slower" if ratio > threshold else "  faster" if ratio < 1 / threshold else ""
+            if ratio > threshold:
+                regressions.append((name, point["size"]))
+            report(f"{name:<28} {point['size']:>9} {old[point['size']]:10.5f} {point['best']:10.5f} "
+                   f"{ratio:6.2f}x{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the lab benchmark suite")
+    parser.add_argument("cases", nargs="*", help="substrings of the cases to run (default: all)")
+    parser.add_argument("--quick", action="store_true", help="two sizes per case")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", default=BASELINE if os.path.exists(BASELINE) else None,
+                        help="compare against this JSON file (default: the stored baseline.json)")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="ratio above which a case counts as a regression")
+    args = parser.parse_args()
+
+    names = [name for name in CASES if not args.cases or any(part in name for part in args.cases)]
+    if not names:
+        parser.error(f"no case matches {args.cases}; cases are {', '.join(CASES)}")
+
+    print(f"{'case':<28} {'size':>9} {'best s':>10} {'median s':>10} {'slope':>6}")
+    results = run_suite(names, args.quick, args.repeat, args.seed)
+    document = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "time": datetime.datetime.now().isoformat(timespec="seconds"),
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "quick": args.quick,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+
+    if args.baseline and os.path.abspath(args.baseline) != os.path.abspath(args.output or ""):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold}x")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
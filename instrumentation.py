@@ -0,0 +1,134 @@
+import functools
+import json
+import platform
+import time
+import tracemalloc
+
+# Opt-in instrumentation of the lab engines. A run is a `with` block:
+#
+#   with Instrumentation(lab2, lab5, memory=True) as run:
+#       fa.convert_ndfa_to_dfa()
+#       converter.convert()
+#   run.dump("run.json")
+#
+# The hook: every instrumented lab module has a module-level INSTRUMENT,
+# normally None. For the duration of a run it is set to the run, and the
+# module reports through run.count(name, n) and run.maximum(name, value),
+# after checking that INSTRUMENT is not None. The labs import nothing from
+# here. The methods listed in STAGES are also wrapped for the run, to time
+# them and, with memory=True, to record their tracemalloc peak. On exit
+# everything is put back, so nothing is wrapped or counted while no run is
+# active.
+
+# Methods timed as stages, per module
+STAGES = {
+    "lab1": [("Grammar", "to_finite_automaton"), ("FiniteAutomaton", "accepts_many")],
+    "lab2": [("FiniteAutomaton", "convert_ndfa_to_dfa"), ("DFA", "minimize")],
+    "lab5": [("GrammarCNFConverter", name) for name in (
+        "convert", "eliminate_epsilon_productions", "eliminate_unit_productions",
+        "eliminate_non_productive_symbols", "eliminate_inaccessible_symbols", "convert_to_cnf")],
+    "lexer": [("Lexer", "tokenize"), ("Lexer", "tokenize_compact")],
+}
+
+
+class Instrumentation:
+    def __init__(self, *modules, memory=False):
+        self.modules = modules
+        self.memory = memory
+        self.counters = {}
+        self.maxima = {}
+        self.stages = {}
+        self._open = []       # [start time, memory at start, highest peak seen] per open stage
+        self._restore = []
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def maximum(self, name, value):
+        if value > self.maxima.get(name, value - 1):
+            self.maxima[name] = value
+
+    def stage(self, name):
+        return _Stage(self, name)
+
+    def _enter_stage(self):
+        current = peak = 0
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            # Stages nest: the enclosing stages keep the peak so far, then
+            # the peak restarts for this one
+            for frame in self._open:
+                frame[2] = max(frame[2], peak)
+            tracemalloc.reset_peak()
+        self._open.append([time.perf_counter(), current, current])
+
+    def _exit_stage(self, name):
+        elapsed = time.perf_counter()
+        start, start_memory, peak = self._open.pop()
+        elapsed -= start
+        record = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0})
+        record["calls"] += 1
+        record["seconds"] += elapsed
+        if self.memory:
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            for frame in self._open:
+                frame[2] = max(frame[2], peak)
+            record["peak_bytes"] = max(record.get("peak_bytes", 0), peak - start_memory)
+
+    def __enter__(self):
+        if self.memory:
+            self._started_tracing = not tracemalloc.is_tracing()
+            if self._started_tracing:
+                tracemalloc.start()
+        for module in self.modules:
+            self._restore.append((module, "INSTRUMENT", module.INSTRUMENT))
+            module.INSTRUMENT = self
+            for class_name, method_name in STAGES.get(module.__name__, ()):
+                cls = getattr(module, class_name)
+                method = cls.__dict__[method_name]
+                self._restore.append((cls, method_name, method))
+                setattr(cls, method_name, self._timed(f"{module.__name__}.{method_name}", method))
+        return self
+
+    def __exit__(self, *exc_info):
+        while self._restore:
+            owner, name, value = self._restore.pop()
+            setattr(owner, name, value)
+        if self.memory and self._started_tracing:
+            tracemalloc.stop()
+        return False
+
+    def _timed(self, name, method):
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            with _Stage(self, name):
+                return method(*args, **kwargs)
+        return timed
+
+    def results(self):
+        return {"counters": dict(sorted(self.counters.items())),
+                "maxima": dict(sorted(self.maxima.items())),
+                "stages": self.stages}
+
+    def dump(self, target, **meta):
+        # JSON of the run to a path or an open file; `meta` is stored with it
+        document = {"meta": {"python": platform.python_version(), "memory": self.memory, **meta},
+                    **self.results()}
+        if hasattr(target, "write"):
+            json.dump(document, target, indent=2)
+        else:
+            with open(target, "w", encoding="utf-8") as f:
+                json.dump(document, f, indent=2)
+
+
+class _Stage:
+    def __init__(self, run, name):
+        self.run = run
+        self.name = name
+
+    def __enter__(self):
+        self.run._enter_stage()
+
+    def __exit__(self, *exc_info):
+        self.run._exit_stage(self.name)
+        return False
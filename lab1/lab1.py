@@ -1,4 +1,13 @@
 import random
+from array import array
+from multiprocessing import Pool
+
+# Expansions deeper than this only use each non-terminal's quickest way out
+DEFAULT_MAX_DEPTH = 10000
+# Strings per shard in generate_bulk; every shard gets its own derived seed
+SHARD_SIZE = 10000
+# While instrumented, accepts() reports its simulation steps here
+INSTRUMENT = None
 
 class Grammar:
     def __init__(self, VN, VT, P, start_symbol):
@@ -6,6 +15,8 @@ class Grammar:
         self.VT = VT  # Terminals
         self.P = P    # Production rules
         self.start_symbol = start_symbol
+        self._compiled = None
+        self._uniform_sampler = None
 
     def generate_string(self, symbol=None):
         if symbol is None:
@@ -24,6 +35,90 @@ class Grammar:
         
         return [self.generate_string() for _ in range(n)]
 
+    def compile(self):
+        # Integer-coded form of P for generate_bulk. Non-terminals with
+        # productions are 0..k-1; every other symbol is k + i and stands for
+        # texts[i] (the terminal itself, or "" for unknown symbols, like
+        # generate_string). The productions of non-terminal A are
+        # first[A]..first[A] + count[A] - 1, and production p is
+        # rhs[rhs_start[p]:rhs_start[p + 1]].
+        if self._compiled is None:
+            heads = list(self.P)
+            codes = {A: i for i, A in enumerate(heads)}
+            texts = []
+            first, count, rhs_start, rhs = array('i'), array('i'), array('i'), array('i')
+
+            def code(symbol):
+                if symbol not in codes:
+                    codes[symbol] = len(heads) + len(texts)
+                    texts.append(symbol if symbol in self.VT else "")
+                return codes[symbol]
+
+            for A in heads:
+                first.append(len(rhs_start))
+                count.append(len(self.P[A]))
+                for production in self.P[A]:
+                    rhs_start.append(len(rhs))
+                    rhs.extend(code(s) for s in production)
+            rhs_start.append(len(rhs))
+
+            # The production giving the shallowest complete derivation of
+            # each non-terminal (-1 if it can never finish)
+            height = [None] * len(heads)
+            escape = array('i', [-1] * len(heads))
+            changed = True
+            while changed:
+                changed = False
+                for A in range(len(heads)):
+                    for p in range(first[A], first[A] + count[A]):
+                        body = rhs[rhs_start[p]:rhs_start[p + 1]]
+                        if any(s < len(heads) and height[s] is None for s in body):
+                            continue
+                        h = 1 + max((height[s] for s in body if s < len(heads)), default=0)
+                        if height[A] is None or h < height[A]:
+                            height[A] = h
+                            escape[A] = p
+                            changed = True
+
+            start = codes.get(self.start_symbol)
+            if start is None:
+                start = code(self.start_symbol)
+            self._compiled = (len(heads), texts, first, count, rhs_start, rhs, escape, start)
+        return self._compiled
+
+    def generate_bulk(self, n, seed=None, max_depth=DEFAULT_MAX_DEPTH, processes=1):
+        # Generate n strings from the compiled grammar without recursion.
+        # Strings are produced in shards of SHARD_SIZE, each with a seed derived
+        # from (seed, shard index), so the output for a given seed is the same
+        # whether the shards run here or spread over a pool of processes.
+        compiled = self.compile()
+        shards = [(compiled, min(SHARD_SIZE, n - begin), f"{seed}:{begin // SHARD_SIZE}", max_depth)
+                  for begin in range(0, n, SHARD_SIZE)]
+        if seed is None:
+            base = random.getrandbits(64)
+            shards = [(c, size, f"{base}:{i}", depth) for i, (c, size, _, depth) in enumerate(shards)]
+
+        if processes > 1 and len(shards) > 1:
+            with Pool(processes) as pool:
+                results = pool.map(_generate_shard, shards)
+        else:
+            results = map(_generate_shard, shards)
+        return [string for shard in results for string in shard]
+
+    def sample_uniform(self, n, k=1, seed=None):
+        # k strings of length exactly n, each drawn uniformly from all strings
+        # of that length in the language; the count tables are kept for later
+        # calls
+        if self._uniform_sampler is None:
+            self._uniform_sampler = UniformSampler(self.to_finite_automaton())
+        return self._uniform_sampler.sample(n, k, seed)
+
+    def enumerate_strings(self, max_length, after=None):
+        # Every string of the language up to max_length, in shortlex order
+        # (shorter first, then alphabetical), lazily; with `after`, resume
+        # with the strings that come after it
+        return ShortlexEnumerator(self.to_finite_automaton()).strings(max_length, after)
+
     def to_finite_automaton(self):
         
         transitions = {}
@@ -45,6 +140,40 @@ class Grammar:
         final_states = {"q_f"}
         return FiniteAutomaton(states, alphabet, transitions, start_state, final_states)
 
+def _generate_shard(args):
+    (num_heads, texts, first, count, rhs_start, rhs, escape, start), n, seed, max_depth = args
+    rng = random.Random(seed)
+    rand = rng.random
+    bodies = [tuple(rhs[rhs_start[p]:rhs_start[p + 1]]) for p in range(len(rhs_start) - 1)]
+    choices = [bodies[first[A]:first[A] + count[A]] for A in range(num_heads)]
+    escapes = [bodies[p] if p >= 0 else None for p in escape]
+    strings = []
+
+    for _ in range(n):
+        out = []
+        # One iterator per open production; the stack height is the depth
+        stack = [iter((start,))]
+        while stack:
+            for symbol in stack[-1]:
+                if symbol >= num_heads:
+                    out.append(texts[symbol - num_heads])
+                    continue
+                if len(stack) < max_depth:
+                    options = choices[symbol]
+                    body = options[int(rand() * len(options))]
+                else:
+                    body = escapes[symbol]
+                    if body is None:
+                        # No finite derivation exists; drop the symbol
+                        continue
+                stack.append(iter(body))
+                break
+            else:
+                stack.pop()
+        strings.append("".join(out))
+    return strings
+
+
 class FiniteAutomaton:
     def __init__(self, states, alphabet, transitions, start_state, final_states):
         self.states = states
@@ -52,19 +181,242 @@ class FiniteAutomaton:
         self.transitions = transitions
         self.start_state = start_state
         self.final_states = final_states
+        self._compiled = None
+
+    def compile(self):
+        # Number the states once and turn the (state, symbol) -> set dict into,
+        # for every symbol, a list of successor bitsets indexed by state number
+        if self._compiled is None:
+            index = {}
+            for state in (self.start_state, *self.states):
+                index.setdefault(state, len(index))
+            for (state, _), next_states in self.transitions.items():
+                for s in (state, *next_states):
+                    index.setdefault(s, len(index))
+
+            table = {}
+            for (state, symbol), next_states in self.transitions.items():
+                successors = table.setdefault(symbol, [0] * len(index))
+                for next_state in next_states:
+                    successors[index[state]] |= 1 << index[next_state]
+
+            start_mask = 1 << index[self.start_state]
+            final_mask = 0
+            for state in self.final_states:
+                if state in index:
+                    final_mask |= 1 << index[state]
+            self._compiled = (table, start_mask, final_mask)
+        return self._compiled
 
     def accepts(self, input_string):
-        return self._accepts_helper(input_string, self.start_state)
-
-    def _accepts_helper(self, remaining, current_state):
-        if not remaining:
-            return current_state in self.final_states
-        symbol = remaining[0]
-        next_states = self.transitions.get((current_state, symbol), set())
-        for state in next_states:
-            if self._accepts_helper(remaining[1:], state):
-                return True
-        return False
+        return self._simulate(input_string, *self.compile())
+
+    def accepts_many(self, strings):
+        compiled = self.compile()
+        return [self._simulate(s, *compiled) for s in strings]
+
+    @staticmethod
+    def _simulate(input_string, table, start_mask, final_mask):
+        # Track the set of all states the automaton can be in as a bitset, so
+        # every symbol costs at most one pass over the states
+        counting = INSTRUMENT is not None
+        steps = visits = widest = 0
+        current = start_mask
+        for symbol in input_string:
+            successors = table.get(symbol)
+            if successors is None:
+                accepted = False
+                break
+            if counting:
+                width = current.bit_count()
+                steps += 1
+                visits += width
+                widest = max(widest, width)
+            next_states = 0
+            while current:
+                lowest = current & -current
+                next_states |= successors[lowest.bit_length() - 1]
+                current ^= lowest
+            if not next_states:
+                accepted = False
+                break
+            current = next_states
+        else:
+            accepted = bool(current & final_mask)
+        if counting:
+            INSTRUMENT.count("lab1.simulation_steps", steps)
+            INSTRUMENT.count("lab1.state_visits", visits)
+            INSTRUMENT.maximum("lab1.max_active_states", widest)
+        return accepted
+
+class UniformSampler:
+    # Draws strings of an exact length uniformly from the language of a
+    # FiniteAutomaton. The automaton is determinized first, so a string with
+    # several derivations is still counted once. counts[k][q] is the number of
+    # strings of length k accepted from DFA state q, kept as exact big
+    # integers and extended only as far as the longest length asked for.
+    def __init__(self, fa):
+        table, start_mask, final_mask = fa.compile()
+        self.symbols = sorted(table)
+
+        # Subset construction over the bitset form of the automaton
+        ids = {start_mask: 0}
+        masks = [start_mask]
+        self.delta = []
+        for mask in masks:
+            row = []
+            for symbol in self.symbols:
+                successors = table[symbol]
+                next_mask = 0
+                bits = mask
+                while bits:
+                    lowest = bits & -bits
+                    next_mask |= successors[lowest.bit_length() - 1]
+                    bits ^= lowest
+                if not next_mask:
+                    row.append(-1)
+                    continue
+                if next_mask not in ids:
+                    ids[next_mask] = len(masks)
+                    masks.append(next_mask)
+                row.append(ids[next_mask])
+            self.delta.append(row)
+
+        self.counts = [[1 if mask & final_mask else 0 for mask in masks]]
+
+    def count(self, n):
+        # Number of strings of length n in the language
+        self._extend(n)
+        return self.counts[n][0]
+
+    def _extend(self, n):
+        counts = self.counts
+        while len(counts) <= n:
+            previous = counts[-1]
+            counts.append([sum(previous[t] for t in row if t >= 0) for row in self.delta])
+
+    def sample(self, n, k=1, seed=None):
+        if self.count(n) == 0:
+            raise ValueError(f"The language has no strings of length {n}")
+        rng = random.Random(seed)
+        return [self._draw(n, rng) for _ in range(k)]
+
+    def _draw(self, n, rng):
+        counts = self.counts
+        state = 0
+        chars = []
+        for remaining in range(n, 0, -1):
+            # Pick the next symbol with probability proportional to the number
+            # of completions it leaves
+            r = rng.randrange(counts[remaining][state])
+            below = counts[remaining - 1]
+            for symbol, next_state in zip(self.symbols, self.delta[state]):
+                if next_state < 0:
+                    continue
+                if r < below[next_state]:
+                    chars.append(symbol)
+                    state = next_state
+                    break
+                r -= below[next_state]
+        return "".join(chars)
+
+
+class ShortlexEnumerator:
+    # Lazily lists the strings of a FiniteAutomaton's language in shortlex
+    # order, without duplicates. Subsets of NFA states are determinized on
+    # the fly as the walk reaches them. live[r] is the bitset of NFA states
+    # that accept some string of exactly r more symbols, so the walk never
+    # enters a dead branch, and a length layer only needs its current path.
+    def __init__(self, fa, cache_size=1 << 16):
+        self.table, self.start_mask, final_mask = fa.compile()
+        self.symbols = sorted(self.table)
+        self.rows = [self.table[symbol] for symbol in self.symbols]
+        self.live = [final_mask]
+        self.cache_size = cache_size
+        self._steps = {}
+
+    def _live(self, r):
+        while len(self.live) <= r:
+            previous = self.live[-1]
+            mask = 0
+            for row in self.rows:
+                for state, successors in enumerate(row):
+                    if successors & previous:
+                        mask |= 1 << state
+            self.live.append(mask)
+        return self.live[r]
+
+    def _step(self, mask):
+        # The successor subset for every symbol: one lazily built DFA state
+        successors = self._steps.get(mask)
+        if successors is None:
+            successors = []
+            for row in self.rows:
+                next_mask = 0
+                bits = mask
+                while bits:
+                    lowest = bits & -bits
+                    next_mask |= row[lowest.bit_length() - 1]
+                    bits ^= lowest
+                successors.append(next_mask)
+            if len(self._steps) >= self.cache_size:
+                self._steps.clear()
+            self._steps[mask] = successors
+        return successors
+
+    def strings(self, max_length, after=None):
+        if after is None:
+            first_length = 0
+        else:
+            first_length = len(after)
+            index = {symbol: i for i, symbol in enumerate(self.symbols)}
+            if any(symbol not in index for symbol in after):
+                raise ValueError(f"'{after}' uses symbols outside the alphabet {self.symbols}")
+        for length in range(first_length, max_length + 1):
+            resume = [index[symbol] for symbol in after] if after is not None and length == first_length else None
+            yield from self._layer(length, resume)
+
+    def _layer(self, length, resume=None):
+        symbols = self.symbols
+        if not self.start_mask & self._live(length):
+            return
+        masks = [self.start_mask]
+        chosen = []
+        if resume is None:
+            next_index = 0
+        else:
+            # Walk down the path of the string to resume after, then carry on
+            # as if it had just been yielded
+            for i in resume:
+                masks.append(self._step(masks[-1])[i])
+                chosen.append(i)
+
+        while True:
+            depth = len(chosen)
+            if depth == length:
+                if resume is None:
+                    yield "".join(symbols[i] for i in chosen)
+                resume = None
+                if depth == 0:
+                    return
+                next_index = chosen.pop() + 1
+                masks.pop()
+                continue
+
+            live = self._live(length - depth - 1)
+            successors = self._step(masks[-1])
+            for i in range(next_index, len(symbols)):
+                if successors[i] & live:
+                    chosen.append(i)
+                    masks.append(successors[i])
+                    next_index = 0
+                    break
+            else:
+                if depth == 0:
+                    return
+                next_index = chosen.pop() + 1
+                masks.pop()
+
 
 VN = {"S", "A", "B", "C"}
 VT = {"a", "b"}
@@ -78,16 +430,21 @@ P = {
 grammar = Grammar(VN, VT, P, "S")
 
 
-print("Generated strings:")
-for s in grammar.generate_n_strings():
-    print(s)
+def main():
+    print("Generated strings:")
+    for s in grammar.generate_n_strings():
+        print(s)
+
+    fa = grammar.to_finite_automaton()
+
+    print("\nEnter strings to check (or 'exit'):")
+    while True:
+        input_string = input("Enter string: ").strip()
+        if input_string.lower() == 'exit':
+            break
+        is_valid = fa.accepts(input_string)
+        print(f"String '{input_string}' is {'valid' if is_valid else 'invalid'}")
 
-fa = grammar.to_finite_automaton()
+if __name__ == "__main__":
+    main()
 
-print("\nEnter strings to check (or 'exit'):")
-while True:
-    input_string = input("Enter string: ").strip()
-    if input_string.lower() == 'exit':
-        break
-    is_valid = fa.accepts(input_string)
-    print(f"String '{input_string}' is {'valid' if is_valid else 'invalid'}")
@@ -1,3 +1,17 @@
+from array import array
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+
+# While instrumented, convert_ndfa_to_dfa() reports the subsets it explores here
+INSTRUMENT = None
+
+
 class Grammar:
     def __init__(self, non_terminals, terminals, productions):
         self.non_terminals = non_terminals
@@ -37,6 +51,604 @@ class Grammar:
         else:
             return "Type 0 (Recursively Enumerable)"
 
+    def classify_structured(self):
+        # classify() on symbol sequences instead of characters, so multi-
+        # character symbols like T1 or X3 work; see classify_productions
+        return classify_productions(self.productions, self.non_terminals, self.terminals)
+
+# Chomsky levels in the wording of Grammar.classify
+GRAMMAR_TYPES = {
+    3: "Type 3 (Regular)",
+    2: "Type 2 (Context-Free)",
+    1: "Type 1 (Context-Sensitive)",
+    0: "Type 0 (Recursively Enumerable)",
+}
+
+# Without a symbol table, an upper-case letter and the digits or primes after
+# it are one non-terminal (S, T1, X12, A'), anything else is one terminal
+DEFAULT_SYMBOL = re.compile(r"[A-Z][0-9']*|\S")
+
+
+def _starts_upper(symbol):
+    return symbol[0].isupper()
+
+
+class ProductionTokenizer:
+    # Reads rules like 'A → aB', 'X3 -> T1 X4' or 'S → a | bS' for the
+    # classifier: split() separates the sides, shape() sums one side up.
+    # Symbols written apart are taken as they are; written together, they are
+    # split with the known symbols (longest first), falling back to
+    # DEFAULT_SYMBOL.
+    CACHE_SIZE = 1 << 16
+
+    def __init__(self, non_terminals=None, terminals=None):
+        self.non_terminals = set(non_terminals) if non_terminals else None
+        known = sorted(set(non_terminals or ()) | set(terminals or ()), key=len, reverse=True)
+        if any(len(symbol) > 1 for symbol in known):
+            self.symbol = re.compile('|'.join(map(re.escape, known)) + '|' + DEFAULT_SYMBOL.pattern)
+        else:
+            self.symbol = DEFAULT_SYMBOL
+        if self.non_terminals is not None:
+            self.is_non_terminal = self.non_terminals.__contains__
+        else:
+            self.is_non_terminal = _starts_upper
+        self._shapes = {}
+
+    def split(self, line):
+        # (lhs text, [rhs text of every alternative])
+        head, arrow, body = line.partition('→')
+        if not arrow:
+            head, arrow, body = line.partition('->')
+        if not arrow or '→' in body or '->' in body:
+            raise ValueError(f"Not a production: {line!r}")
+        return head, body.split('|') if '|' in body else (body,)
+
+    def shape(self, text):
+        # What the classifier needs to know about one side of a rule:
+        # (number of symbols, is a single non-terminal, is a regular right
+        # side: terminals only, or one terminal then one non-terminal).
+        # Grammars repeat the same sides a lot, so shapes are cached by text
+        shape = self._shapes.get(text)
+        if shape is not None:
+            return shape
+        symbols = text.split()
+        if len(symbols) == 1 and len(symbols[0]) > 1:
+            symbols = self.symbol.findall(symbols[0])
+        is_non_terminal = self.is_non_terminal
+        if len(symbols) == 1:
+            single = is_non_terminal(symbols[0])
+            shape = (1, single, not single)
+        elif len(symbols) == 2:
+            shape = (2, False, not is_non_terminal(symbols[0]))
+        else:
+            shape = (len(symbols), False, bool(symbols) and not any(map(is_non_terminal, symbols)))
+        if len(self._shapes) >= self.CACHE_SIZE:
+            self._shapes.clear()
+        self._shapes[text] = shape
+        return shape
+
+
+class GrammarClassification:
+    # Result of classify_productions: the Chomsky level (3..0) and, for every
+    # level whose check the grammar failed, the first rule that failed it as
+    # (rule number, rule text). Rule numbers count rules only, not blank or
+    # comment lines. A rule with a longer left than right side fails level 1
+    # even in a grammar that stays at level 2 or 3, as in Grammar.classify
+    def __init__(self, level, counterexamples, rules):
+        self.level = level
+        self.counterexamples = counterexamples
+        self.rules = rules
+
+    @property
+    def name(self):
+        return GRAMMAR_TYPES[self.level]
+
+    @property
+    def demoted_by(self):
+        # The rule that kept the grammar out of the level just above its own
+        return self.counterexamples.get(self.level + 1)
+
+    def __repr__(self):
+        demoted = f", demoted by rule {self.demoted_by[0]}: {self.demoted_by[1]!r}" if self.demoted_by else ""
+        return f"{self.name} ({self.rules} rules read{demoted})"
+
+
+def classify_productions(lines, non_terminals=None, terminals=None):
+    # One pass over production strings (e.g. the lines of a grammar file;
+    # blank lines and '#' comments are skipped). Levels 3 and 2 are only
+    # checked until a rule rules them out; the level 1 length check runs on
+    # every rule, so the result does not depend on rule order. Reading stops
+    # once Type 0 is certain.
+    tokenizer = ProductionTokenizer(non_terminals, terminals)
+    split, shape = tokenizer.split, tokenizer.shape
+    counterexamples = {}
+    level = 3
+    rules = 0
+    for line in lines:
+        line = line.strip()
+        if not line or line[0] == '#':
+            continue
+        rules += 1
+        head, alternatives = split(line)
+        lhs_length, single_head, _ = shape(head.strip())
+        for alternative in alternatives:
+            rhs_length, _, regular_body = shape(alternative.strip())
+            if 1 not in counterexamples and lhs_length > rhs_length:
+                counterexamples[1] = (rules, line)
+            if level == 3 and not (single_head and regular_body):
+                counterexamples[3] = (rules, line)
+                level = 2
+            if level == 2 and not single_head:
+                counterexamples[2] = (rules, line)
+                level = 1
+            if level == 1 and 1 in counterexamples:
+                level = 0
+            if level == 0:
+                return GrammarClassification(level, counterexamples, rules)
+    return GrammarClassification(level, counterexamples, rules)
+
+
+# Marks a missing transition in a DFA transition table
+DEAD = -1
+
+# Transition symbol of an ε-move
+EPSILON = 'ε'
+
+
+def epsilon_closures(successors):
+    # ε-closure of every state as a bitset, given each state's ε-successors
+    # as a list of state numbers. States on an ε-cycle share one closure, so
+    # it is built once per strongly connected component (iterative Tarjan):
+    # components come out successors first, so a component's closure is its
+    # own states plus the finished closures of the components it points to.
+    n = len(successors)
+    order = [-1] * n        # discovery number
+    low = [0] * n
+    component = [-1] * n
+    closures = []           # per component
+    stack = []
+    counter = 0
+    for root in range(n):
+        if order[root] >= 0:
+            continue
+        order[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        work = [(root, 0)]
+        while work:
+            state, i = work[-1]
+            targets = successors[state]
+            if i < len(targets):
+                work[-1] = (state, i + 1)
+                target = targets[i]
+                if order[target] < 0:
+                    order[target] = low[target] = counter
+                    counter += 1
+                    stack.append(target)
+                    work.append((target, 0))
+                elif component[target] < 0 and order[target] < low[state]:
+                    low[state] = order[target]
+                continue
+            work.pop()
+            if work and low[state] < low[work[-1][0]]:
+                low[work[-1][0]] = low[state]
+            if low[state] == order[state]:
+                number = len(closures)
+                members = []
+                closure = 0
+                while True:
+                    member = stack.pop()
+                    component[member] = number
+                    members.append(member)
+                    closure |= 1 << member
+                    if member == state:
+                        break
+                for member in members:
+                    for target in successors[member]:
+                        if component[target] != number:
+                            closure |= closures[component[target]]
+                closures.append(closure)
+    return [closures[component[state]] for state in range(n)]
+
+# Binary DFA files: a header, the alphabet as JSON, the accepting map (one
+# byte per state) and the transition table as 4-byte ints, padded so the
+# table starts on a 4-byte boundary and can be used straight from an mmap
+DFA_MAGIC = b'LFADFA\0\0'
+DFA_FORMAT_VERSION = 1
+DFA_HEADER = struct.Struct('<8sHHIII')  # magic, version, big-endian flag, width, states, alphabet bytes
+
+# Part of every NFA's cache key; bumped when convert_ndfa_to_dfa starts
+# building a different DFA for the same NFA (2: ε-moves are closures, not symbols)
+NFA_KEY_VERSION = 2
+
+
+class DFA:
+    # Deterministic automaton with integer states 0..n-1, 0 being the start
+    # state, and a dense row-major transition table: the successor of state q
+    # on the symbol in column c is table[q * len(alphabet) + c].
+    def __init__(self, alphabet, table, accepting, subsets=None, nfa_states=None):
+        self.alphabet = list(alphabet)
+        self.symbol_index = {symbol: column for column, symbol in enumerate(self.alphabet)}
+        self.width = len(self.alphabet)
+        self.table = table            # array('i')
+        self.accepting = accepting    # bytearray, 1 for accepting states
+        self.start = 0
+        # The NFA subset (a bitset over nfa_states) each state was built from
+        self.subsets = subsets
+        self.nfa_states = nfa_states
+
+    @property
+    def num_states(self):
+        return len(self.accepting)
+
+    def step(self, state, symbol):
+        column = self.symbol_index.get(symbol)
+        if state == DEAD or column is None:
+            return DEAD
+        return self.table[state * self.width + column]
+
+    def run(self, string, state=0):
+        # Return the state reached after reading the whole string, or DEAD
+        table = self.table
+        symbol_index = self.symbol_index
+        width = self.width
+        for symbol in string:
+            column = symbol_index.get(symbol)
+            if column is None:
+                return DEAD
+            state = table[state * width + column]
+            if state == DEAD:
+                return DEAD
+        return state
+
+    def accepts(self, string):
+        state = self.run(string)
+        return state != DEAD and self.accepting[state] == 1
+
+    def subset(self, state):
+        # The NFA states the given DFA state stands for
+        bits = self.subsets[state]
+        return frozenset(name for i, name in enumerate(self.nfa_states) if bits >> i & 1)
+
+    @staticmethod
+    def state_name(state):
+        # A, B, ..., Z, AA, AB, ... like spreadsheet columns
+        name = ''
+        state += 1
+        while state:
+            state, remainder = divmod(state - 1, 26)
+            name = chr(65 + remainder) + name
+        return name
+
+    def as_tuple(self):
+        # The (states, transitions, final states) form with letter-named states
+        names = [self.state_name(state) for state in range(self.num_states)]
+        transitions = {}
+        for state in range(self.num_states):
+            row = self.table[state * self.width:(state + 1) * self.width]
+            for symbol, next_state in zip(self.alphabet, row):
+                if next_state != DEAD:
+                    transitions.setdefault(names[state], {})[symbol] = names[next_state]
+        final_states = {names[state] for state in range(self.num_states) if self.accepting[state]}
+        return names, transitions, final_states
+
+    def __iter__(self):
+        # Allows `states, transitions, final_states = fa.convert_ndfa_to_dfa()`
+        return iter(self.as_tuple())
+
+    def to_bytes(self):
+        alphabet = json.dumps(self.alphabet).encode('utf-8')
+        header = DFA_HEADER.pack(DFA_MAGIC, DFA_FORMAT_VERSION, sys.byteorder == 'big',
+                                 self.width, self.num_states, len(alphabet))
+        padding = -(len(header) + len(alphabet) + self.num_states) % 4
+        table = array('i', self.table)
+        return b''.join([header, alphabet, bytes(self.accepting), bytes(padding), table.tobytes()])
+
+    def save(self, path):
+        # Written to a temporary file first, so readers never see half a file
+        directory = os.path.dirname(os.path.abspath(path))
+        with tempfile.NamedTemporaryFile('wb', dir=directory, delete=False) as f:
+            f.write(self.to_bytes())
+        os.replace(f.name, path)
+
+    @classmethod
+    def from_buffer(cls, buffer):
+        # A DFA over any buffer holding to_bytes() output. The accepting map
+        # and the table are views into the buffer, not copies (unless the
+        # file was written with the other byte order).
+        view = memoryview(buffer)
+        if len(view) < DFA_HEADER.size:
+            raise ValueError("Not a DFA file: too short")
+        magic, version, big_endian, width, states, alphabet_size = DFA_HEADER.unpack_from(view)
+        if magic != DFA_MAGIC:
+            raise ValueError("Not a DFA file: bad magic number")
+        if version != DFA_FORMAT_VERSION:
+            raise ValueError(f"Unsupported DFA file version {version}")
+        offset = DFA_HEADER.size
+        alphabet = json.loads(bytes(view[offset:offset + alphabet_size]).decode('utf-8'))
+        offset += alphabet_size
+        accepting = view[offset:offset + states]
+        offset += states + (-offset - states) % 4
+        table_bytes = view[offset:offset + 4 * states * width]
+        if len(accepting) != states or len(table_bytes) != 4 * states * width:
+            raise ValueError("Truncated DFA file")
+        if bool(big_endian) == (sys.byteorder == 'big'):
+            table = table_bytes.cast('i')
+        else:
+            table = array('i', table_bytes.tobytes())
+            table.byteswap()
+        return cls(alphabet, table, accepting)
+
+    @classmethod
+    def load(cls, path):
+        # Maps the file read-only: worker processes loading the same file
+        # share its pages
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls.from_buffer(mapped)
+
+    def minimize(self):
+        # Hopcroft's partition refinement, O(n k log n). Unreachable states are
+        # dropped, the automaton is completed with a sink state, and the
+        # resulting classes are renumbered breadth-first from the start state
+        # in alphabet order, so equivalent DFAs give identical tables. The
+        # class of the sink is turned back into DEAD transitions.
+        width = self.width
+
+        # Reachable states, compacted to 0..m-1, plus the sink as state m
+        compact = {self.start: 0}
+        order = [self.start]
+        for state in order:
+            for next_state in self.table[state * width:(state + 1) * width]:
+                if next_state != DEAD and next_state not in compact:
+                    compact[next_state] = len(order)
+                    order.append(next_state)
+        sink = len(order)
+        size = sink + 1
+
+        delta = [[sink] * size for _ in range(width)]
+        inverse = [[[] for _ in range(size)] for _ in range(width)]
+        for column in range(width):
+            row = delta[column]
+            predecessors = inverse[column]
+            for new_state, state in enumerate(order):
+                next_state = self.table[state * width + column]
+                if next_state != DEAD:
+                    row[new_state] = compact[next_state]
+            for state in range(size):
+                predecessors[row[state]].append(state)
+
+        # Refinable partition: every block is a range first[b]:end[b] of
+        # `elements`, and `location` finds a state inside `elements`
+        accepting = [state for state in range(sink) if self.accepting[order[state]]]
+        rejecting = [state for state in range(size) if state == sink or not self.accepting[order[state]]]
+        elements = accepting + rejecting
+        location = [0] * size
+        for i, state in enumerate(elements):
+            location[state] = i
+        block_of = [0] * size
+        first, end = [], []
+        for block in (accepting, rejecting):
+            if block:
+                for state in block:
+                    block_of[state] = len(first)
+                first.append(location[block[0]])
+                end.append(location[block[0]] + len(block))
+        marked = [0] * len(first)
+
+        worklist = [min(range(len(first)), key=lambda b: end[b] - first[b])]
+
+        while worklist:
+            splitter = worklist.pop()
+            members = elements[first[splitter]:end[splitter]]
+
+            for predecessors in inverse:
+                # Move every state with a transition into the splitter to the
+                # front of its block
+                touched = []
+                for state in members:
+                    for p in predecessors[state]:
+                        block = block_of[p]
+                        if marked[block] == 0:
+                            touched.append(block)
+                        i = location[p]
+                        j = first[block] + marked[block]
+                        other = elements[j]
+                        elements[i], elements[j] = other, p
+                        location[other], location[p] = i, j
+                        marked[block] += 1
+
+                for block in touched:
+                    count = marked[block]
+                    marked[block] = 0
+                    block_size = end[block] - first[block]
+                    if count == block_size:
+                        continue
+
+                    # Split, giving the new block id to the smaller half
+                    new_block = len(first)
+                    if count <= block_size - count:
+                        first.append(first[block])
+                        end.append(first[block] + count)
+                        first[block] += count
+                    else:
+                        first.append(first[block] + count)
+                        end.append(end[block])
+                        end[block] = first[block] + count
+                    marked.append(0)
+                    for i in range(first[new_block], end[new_block]):
+                        block_of[elements[i]] = new_block
+
+                    # Queueing the smaller half is enough; if the old block
+                    # was still queued, it now covers the other half
+                    worklist.append(new_block)
+
+        # Renumber the classes breadth-first, leaving out the sink class
+        dead_block = block_of[sink]
+        start_block = block_of[0]
+        if start_block == dead_block:
+            return DFA(self.alphabet, array('i', [DEAD] * width), bytearray(1))
+
+        new_ids = {start_block: 0}
+        blocks = [start_block]
+        table = array('i')
+        new_accepting = bytearray()
+        for block in blocks:
+            representative = elements[first[block]]
+            new_accepting.append(1 if representative != sink and self.accepting[order[representative]] else 0)
+            for column in range(width):
+                next_block = block_of[delta[column][representative]]
+                if next_block == dead_block:
+                    table.append(DEAD)
+                    continue
+                next_id = new_ids.get(next_block)
+                if next_id is None:
+                    next_id = len(blocks)
+                    new_ids[next_block] = next_id
+                    blocks.append(next_block)
+                table.append(next_id)
+
+        return DFA(self.alphabet, table, new_accepting)
+
+
+def _canonical(value):
+    # JSON-ready form of nested containers in which sets and dict keys are
+    # sorted, so equal automata or grammars always serialize the same way
+    if isinstance(value, dict):
+        return sorted(([_canonical(k), _canonical(v)] for k, v in value.items()), key=repr)
+    if isinstance(value, (set, frozenset)):
+        return sorted((_canonical(v) for v in value), key=repr)
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    return value
+
+
+def source_key(*parts):
+    # Cache key for whatever an automaton was built from: an NFA's parts, a
+    # grammar's (VN, VT, P, S), ...
+    text = json.dumps([DFA_FORMAT_VERSION, _canonical(list(parts))], separators=(',', ':'))
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class DFACache:
+    # Directory of binary DFA files named by source_key, so a process can
+    # load a DFA it (or another process) built before instead of rebuilding it
+    def __init__(self, directory=None):
+        self.directory = directory or os.environ.get('LFA_DFA_CACHE') or \
+            os.path.join(os.path.expanduser('~'), '.cache', 'lfa_labs', 'dfa')
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.dfa")
+
+    def get(self, key, build):
+        # The cached DFA for key, or build(), which is then stored
+        path = self.path(key)
+        try:
+            return DFA.load(path)
+        except (FileNotFoundError, ValueError):
+            # Missing, empty, from another format version or damaged
+            pass
+        dfa = build()
+        os.makedirs(self.directory, exist_ok=True)
+        dfa.save(path)
+        return dfa
+
+
+class LazyDFA:
+    # Builds DFA states and transitions from an NFA only when the input reaches
+    # them, in the style of RE2's lazy DFA. At most `max_states` states are
+    # cached; when the cache is full it is flushed as a whole. If flushes come
+    # so often that fewer than `min_chars_per_state` characters are matched per
+    # cached state, the cache is thrashing and the rest of the string is matched
+    # by plain NFA set simulation instead.
+    def __init__(self, fa, max_states=10000, min_chars_per_state=10):
+        _, _, self.alphabet, self.rows, self.start_mask, self.final_mask = fa.compile()
+        self.symbol_index = {symbol: column for column, symbol in enumerate(self.alphabet)}
+        self.max_states = max_states
+        self.min_chars_per_state = min_chars_per_state
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "flushes": 0, "fallbacks": 0}
+        # NFA subset bitset -> (bitset, is accepting, successor states by column)
+        self._cache = {}
+        self._chars = 0            # characters matched over all calls
+        self._chars_at_flush = 0
+
+    @property
+    def cache_size(self):
+        return len(self._cache)
+
+    def _state(self, mask):
+        state = self._cache.get(mask)
+        if state is None:
+            state = (mask, bool(mask & self.final_mask), [None] * len(self.alphabet))
+            self._cache[mask] = state
+        return state
+
+    def _flush(self, chars):
+        self.stats["evictions"] += len(self._cache)
+        self.stats["flushes"] += 1
+        self._cache = {}
+        self._chars_at_flush = chars
+
+    def _successors(self, mask, column):
+        row = self.rows[column]
+        next_mask = 0
+        while mask:
+            lowest = mask & -mask
+            next_mask |= row[lowest.bit_length() - 1]
+            mask ^= lowest
+        return next_mask
+
+    def _simulate_nfa(self, mask, string, pos):
+        for symbol in string[pos:]:
+            column = self.symbol_index.get(symbol)
+            if column is None:
+                return False
+            mask = self._successors(mask, column)
+            if not mask:
+                return False
+        return bool(mask & self.final_mask)
+
+    def accepts(self, string):
+        stats = self.stats
+        symbol_index = self.symbol_index
+        if self.start_mask not in self._cache and len(self._cache) >= self.max_states:
+            self._flush(self._chars)
+        state = self._state(self.start_mask)
+
+        for pos, symbol in enumerate(string):
+            column = symbol_index.get(symbol)
+            if column is None:
+                self._chars += pos
+                return False
+
+            next_state = state[2][column]
+            if next_state is not None:
+                stats["hits"] += 1
+            else:
+                stats["misses"] += 1
+                next_mask = self._successors(state[0], column)
+                if next_mask not in self._cache and len(self._cache) >= self.max_states:
+                    progress = self._chars + pos - self._chars_at_flush
+                    if progress < self.min_chars_per_state * len(self._cache):
+                        stats["fallbacks"] += 1
+                        self._chars += pos
+                        return self._simulate_nfa(next_mask, string, pos + 1)
+                    self._flush(self._chars + pos)
+                next_state = self._state(next_mask)
+                state[2][column] = next_state
+
+            if not next_state[0]:
+                self._chars += pos + 1
+                return False
+            state = next_state
+
+        self._chars += len(string)
+        return state[1]
+
+    def accepts_many(self, strings):
+        return [self.accepts(string) for string in strings]
+
+
 class FiniteAutomaton:
     def __init__(self, states, alphabet, transitions, start_state, final_states):
         self.states = states
@@ -44,13 +656,14 @@ class FiniteAutomaton:
         self.transitions = transitions
         self.start_state = start_state
         self.final_states = final_states
+        self._compiled = None
 
     def is_deterministic(self):
         # Check if the FA is deterministic (no state has more than one transition for the same symbol)
         for state, transitions in self.transitions.items():
             for symbol in transitions:
-                if len(transitions[symbol]) > 1:
-                    return False  # Multiple transitions for the same symbol
+                if len(transitions[symbol]) > 1 or symbol == EPSILON:
+                    return False  # Multiple transitions for the same symbol, or an ε-move
         return True
 
     def convert_to_regular_grammar(self):
@@ -70,41 +683,114 @@ class FiniteAutomaton:
 
         return non_terminals, grammar_rules
 
-    def convert_ndfa_to_dfa(self):
-        # NDFA to DFA conversion using subset construction
-        dfa_states = [frozenset([self.start_state])]
-        dfa_transitions = {}
-        dfa_final_states = set()
-
-        state_map = {frozenset([self.start_state]): 'A'}
-        unprocessed_states = [frozenset([self.start_state])]  # List to keep track of states to process
-
-        print("NFA to DFA State Mapping:")
-        while unprocessed_states:
-            current_state = unprocessed_states.pop()
-            current_state_name = state_map[current_state]
-            print(f"NFA State: {sorted(current_state)} -> DFA State: {current_state_name}")
+    def compile(self):
+        # Number the NFA states and, for every alphabet symbol, build a list of
+        # successor bitsets indexed by state number. Subsets of NFA states are
+        # then plain ints, which hash and union much faster than frozensets.
+        # ε-moves are folded in: the start mask is the start state's ε-closure
+        # and every successor set is ε-closed, so the subset construction and
+        # LazyDFA never see them. Of a closure only the states with a symbol
+        # move or that are final are kept, since the others add nothing to a
+        # subset; with long ε-chains that is most of them.
+        if self._compiled is None:
+            index = {}
+            for state in (self.start_state, *self.states):
+                index.setdefault(state, len(index))
+            for state, transitions in self.transitions.items():
+                index.setdefault(state, len(index))
+                for next_states in transitions.values():
+                    for next_state in next_states:
+                        index.setdefault(next_state, len(index))
+
+            alphabet = [symbol for symbol in self.alphabet if symbol != EPSILON]
+            rows = [[0] * len(index) for _ in alphabet]
+            for column, symbol in enumerate(alphabet):
+                row = rows[column]
+                for state, transitions in self.transitions.items():
+                    for next_state in transitions.get(symbol, []):
+                        row[index[state]] |= 1 << index[next_state]
+
+            start_mask = 1 << index[self.start_state]
+            epsilon_moves = [[] for _ in index]
+            for state, transitions in self.transitions.items():
+                for next_state in transitions.get(EPSILON, []):
+                    epsilon_moves[index[state]].append(index[next_state])
+            final_mask = 0
+            for state in self.final_states:
+                if state in index:
+                    final_mask |= 1 << index[state]
+            if any(epsilon_moves):
+                important = final_mask
+                for row in rows:
+                    for state, mask in enumerate(row):
+                        if mask:
+                            important |= 1 << state
+                closures = [closure & important for closure in epsilon_closures(epsilon_moves)]
+                closed = {0: 0}     # successor set -> its ε-closure
+                for row in rows:
+                    for state, mask in enumerate(row):
+                        closure = closed.get(mask)
+                        if closure is None:
+                            closure = 0
+                            bits = mask
+                            while bits:
+                                lowest = bits & -bits
+                                closure |= closures[lowest.bit_length() - 1]
+                                bits ^= lowest
+                            closed[mask] = closure
+                        row[state] = closure
+                start_mask = closures[index[self.start_state]]
+            self._compiled = (list(index), index, alphabet, rows, start_mask, final_mask)
+        return self._compiled
 
-            for symbol in self.alphabet:
-                next_state = set()
-                for state in current_state:
-                    if symbol in self.transitions.get(state, {}):
-                        next_state.update(self.transitions[state].get(symbol, []))
-
-                if next_state:
-                    next_state_frozenset = frozenset(next_state)
-                    if next_state_frozenset not in state_map:
-                        state_map[next_state_frozenset] = chr(65 + len(state_map))  # Assign new state name
-                        unprocessed_states.append(next_state_frozenset)  # Add new state to unprocessed list
-
-                    if current_state_name not in dfa_transitions:
-                        dfa_transitions[current_state_name] = {}
-                    dfa_transitions[current_state_name][symbol] = state_map[next_state_frozenset]
-
-                    if next_state & set(self.final_states):
-                        dfa_final_states.add(state_map[next_state_frozenset])
-
-        return list(state_map.values()), dfa_transitions, dfa_final_states
+    def convert_ndfa_to_dfa(self):
+        # NDFA to DFA conversion using subset construction. DFA states are
+        # numbered in the order they are discovered, 0 being the start state.
+        nfa_states, index, alphabet, rows, start, final_mask = self.compile()
+
+        subset_ids = {start: 0}
+        subsets = [start]
+        table = array('i')
+        accepting = bytearray()
+
+        current_id = 0
+        while current_id < len(subsets):
+            current = subsets[current_id]
+            accepting.append(1 if current & final_mask else 0)
+
+            for row in rows:
+                next_subset = 0
+                bits = current
+                while bits:
+                    lowest = bits & -bits
+                    next_subset |= row[lowest.bit_length() - 1]
+                    bits ^= lowest
+
+                if not next_subset:
+                    table.append(DEAD)
+                    continue
+                next_id = subset_ids.get(next_subset)
+                if next_id is None:
+                    next_id = len(subsets)
+                    subset_ids[next_subset] = next_id
+                    subsets.append(next_subset)
+                table.append(next_id)
+            current_id += 1
+
+        if INSTRUMENT is not None:
+            INSTRUMENT.count("lab2.subsets_explored", len(subsets))
+            INSTRUMENT.count("lab2.transitions_computed", len(table))
+            INSTRUMENT.maximum("lab2.max_subset_size", max(subset.bit_count() for subset in subsets))
+        return DFA(alphabet, table, accepting, subsets, nfa_states)
+
+    def cache_key(self):
+        return source_key('nfa', NFA_KEY_VERSION, self.states, self.alphabet, self.transitions,
+                          self.start_state, self.final_states)
+
+    def convert_ndfa_to_dfa_cached(self, cache=None):
+        # convert_ndfa_to_dfa() through a DFACache. A DFA loaded from the
+        # cache has no subsets, only its alphabet, accepting map and table.
+        return (cache or DFACache()).get(self.cache_key(), self.convert_ndfa_to_dfa)
 
     def write_dfa_to_dot(self, dfa_states, dfa_transitions, dfa_final_states):
         with open("dfa.dot", "w") as f:
@@ -124,68 +810,78 @@ class FiniteAutomaton:
 
             f.write("}")
 
-# Define the FA based on the provided transitions
-states = ['q0', 'q1', 'q2', 'q3']
-alphabet = ['a', 'b', 'c']
-transitions = {
-    'q0': {'a': ['q0', 'q1']},
-    'q1': {'b': ['q2']},
-    'q2': {'a': ['q2'], 'b': ['q3']},
-    'q3': {'a': ['q3']}
-}
-start_state = 'q0'
-final_states = ['q3']
-
-fa = FiniteAutomaton(states, alphabet, transitions, start_state, final_states)
-
-# Check if the FA is deterministic
-is_deterministic = fa.is_deterministic()
-print(f"The FA is deterministic: {is_deterministic}")
-
-# Convert FA to regular grammar
-non_terminals, grammar_rules = fa.convert_to_regular_grammar()
-print(f"Non-terminals: {non_terminals}")
-print(f"Grammar rules: {grammar_rules}")
-
-# Define the regular grammar based on the FA conversion
-productions = grammar_rules
-grammar = Grammar(non_terminals={key for key in non_terminals.values()}, terminals=set(alphabet), productions=productions)
-
-# Classify the grammar
-classification = grammar.classify()
-print(f"The grammar is classified as: {classification}")
-
-# Convert NDFA to DFA
-dfa_states, dfa_transitions, dfa_final_states = fa.convert_ndfa_to_dfa()
-print(f"DFA States: {dfa_states}")
-print(f"DFA Transitions: {dfa_transitions}")
-print(f"DFA Final States: {dfa_final_states}")
-
-# Generate DFA DOT file
-fa.write_dfa_to_dot(dfa_states, dfa_transitions, dfa_final_states)
-print("DFA DOT file has been generated as dfa.dot.")
-
-# Define the grammar components for the given variant
-vn = {'S', 'A', 'B', 'C'}
-vt = {'a', 'b'}
-p = [
-    'S → aA',
-    'A → bS',
-    'S → aB',
-    'B → aC',
-    'C → a',
-    'C → bS'
-]
-
-# Create a Grammar instance
-specific_grammar = Grammar(vn, vt, p)
-
-# Classify the grammar
-grammar_type = specific_grammar.classify()
-
-# Print results
-print("\nGrammar Analysis Results:")
-print("Non-terminals (VN):", vn)
-print("Terminals (VT):", vt)
-print("Productions (P):", p)
-print("Grammar Classification:", grammar_type)
\ No newline at end of file
+def main():
+    # Define the FA based on the provided transitions
+    states = ['q0', 'q1', 'q2', 'q3']
+    alphabet = ['a', 'b', 'c']
+    transitions = {
+        'q0': {'a': ['q0', 'q1']},
+        'q1': {'b': ['q2']},
+        'q2': {'a': ['q2'], 'b': ['q3']},
+        'q3': {'a': ['q3']}
+    }
+    start_state = 'q0'
+    final_states = ['q3']
+
+    fa = FiniteAutomaton(states, alphabet, transitions, start_state, final_states)
+
+    # Check if the FA is deterministic
+    is_deterministic = fa.is_deterministic()
+    print(f"The FA is deterministic: {is_deterministic}")
+
+    # Convert FA to regular grammar
+    non_terminals, grammar_rules = fa.convert_to_regular_grammar()
+    print(f"Non-terminals: {non_terminals}")
+    print(f"Grammar rules: {grammar_rules}")
+
+    # Define the regular grammar based on the FA conversion
+    productions = grammar_rules
+    grammar = Grammar(non_terminals={key for key in non_terminals.values()}, terminals=set(alphabet), productions=productions)
+
+    # Classify the grammar
+    classification = grammar.classify()
+    print(f"The grammar is classified as: {classification}")
+
+    # Convert NDFA to DFA
+    dfa = fa.convert_ndfa_to_dfa()
+    print("NFA to DFA State Mapping:")
+    for state in range(dfa.num_states):
+        print(f"NFA State: {sorted(dfa.subset(state))} -> DFA State: {dfa.state_name(state)}")
+    dfa_states, dfa_transitions, dfa_final_states = dfa
+    print(f"Minimal DFA states: {dfa.minimize().num_states} (from {dfa.num_states})")
+    print(f"DFA States: {dfa_states}")
+    print(f"DFA Transitions: {dfa_transitions}")
+    print(f"DFA Final States: {dfa_final_states}")
+
+    # Generate DFA DOT file
+    fa.write_dfa_to_dot(dfa_states, dfa_transitions, dfa_final_states)
+    print("DFA DOT file has been generated as dfa.dot.")
+
+    # Define the grammar components for the given variant
+    vn = {'S', 'A', 'B', 'C'}
+    vt = {'a', 'b'}
+    p = [
+        'S → aA',
+        'A → bS',
+        'S → aB',
+        'B → aC',
+        'C → a',
+        'C → bS'
+    ]
+
+    # Create a Grammar instance
+    specific_grammar = Grammar(vn, vt, p)
+
+    # Classify the grammar
+    grammar_type = specific_grammar.classify()
+
+    # Print results
+    print("\nGrammar Analysis Results:")
+    print("Non-terminals (VN):", vn)
+    print("Terminals (VT):", vt)
+    print("Productions (P):", p)
+    print("Grammar Classification:", grammar_type)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,83 +1,321 @@
 import re
 import random
+from functools import lru_cache
 
 MAX_REPETITION = 5
 
-# Helper function to parse regex and generate valid strings
-def generate_strings_from_regex(regex):
-    def parse_expression(expression):
-        result = []
-        index = 0
-
-        while index < len(expression):
-            char = expression[index]
-
-            if char == "(":  # Handle groups
-                end_idx = find_closing_parenthesis(expression, index)
-                sub_exp = expression[index + 1:end_idx]
-                index = end_idx
-                sub_result = parse_expression(sub_exp)
-                result.append(random.choice(sub_result))
-
-            elif char in "*+?":  # Handle repetition
-                prev = result.pop() if result else ""
-                if char == "*":
-                    result.append(prev * random.randint(0, MAX_REPETITION))
-                elif char == "+":
-                    result.append(prev * random.randint(1, MAX_REPETITION))
-                elif char == "?":
-                    result.append(prev if random.choice([True, False]) else "")
-
-            elif char == "|":  # Handle OR operator correctly
-                options = []
-                current_option = ""
-
-                options.append(result.pop() if result else "")
-
-                while index < len(expression) and expression[index] != ")":
-                    if expression[index] == "|":
-                        index += 1  # Skip the | character
-                        current_option = ""
-                        while index < len(expression) and expression[index] != "|" and expression[index] != ")":
-                            current_option += expression[index]
-                            index += 1
-                        options.append(current_option)
-                    else:
+
+def find_closing_parenthesis(expression, start_index):
+    open_count = 1
+    for i in range(start_index + 1, len(expression)):
+        if expression[i] == "(":
+            open_count += 1
+        elif expression[i] == ")":
+            open_count -= 1
+            if open_count == 0:
+                return i
+    raise ValueError("Unmatched parenthesis in expression")
+
+
+# Parse a regex into a list of plan nodes, one per generated piece:
+#   ("lit", text)               literal text
+#   ("group", nodes)            a parenthesized sub-expression
+#   ("star" | "plus" | "opt", node)
+#   ("alt", node, options)      `node` or one of the literal `options`
+#   ("pow", node, count)
+# Like the generator always did, an operator applies to the last piece only,
+# and a repeated piece is generated once and then repeated.
+def parse_regex(expression):
+    nodes = []
+    index = 0
+
+    while index < len(expression):
+        char = expression[index]
+
+        if char == "(":  # Handle groups
+            end_idx = find_closing_parenthesis(expression, index)
+            nodes.append(("group", parse_regex(expression[index + 1:end_idx])))
+            index = end_idx
+
+        elif char in "*+?":  # Handle repetition
+            prev = nodes.pop() if nodes else ("lit", "")
+            nodes.append(({"*": "star", "+": "plus", "?": "opt"}[char], prev))
+
+        elif char == "|":  # Handle OR operator
+            prev = nodes.pop() if nodes else ("lit", "")
+            options = []
+
+            while index < len(expression) and expression[index] != ")":
+                if expression[index] == "|":
+                    index += 1  # Skip the | character
+                    current_option = ""
+                    while index < len(expression) and expression[index] != "|" and expression[index] != ")":
+                        current_option += expression[index]
                         index += 1
-                result.append(random.choice(options))
+                    options.append(current_option)
+                else:
+                    index += 1
+            nodes.append(("alt", prev, options))
 
-            elif char == "^":  # Handle power operator
-                prev = result.pop() if result else ""
-                power_value = ""
+        elif char == "^":  # Handle power operator
+            prev = nodes.pop() if nodes else ("lit", "")
+            power_value = ""
+            index += 1
+            while index < len(expression) and expression[index].isdigit():
+                power_value += expression[index]
                 index += 1
-                while index < len(expression) and expression[index].isdigit():
-                    power_value += expression[index]
-                    index += 1
-                index -= 1
-                result.append(prev * int(power_value))
+            index -= 1
+            nodes.append(("pow", prev, int(power_value)))
 
-            else:  # Literal characters
-                result.append(char)
+        else:  # Literal characters
+            nodes.append(("lit", char))
 
-            index += 1
-        return ["".join(result)]
-
-    def find_closing_parenthesis(expression, start_index):
-        open_count = 1
-        for i in range(start_index + 1, len(expression)):
-            if expression[i] == "(":
-                open_count += 1
-            elif expression[i] == ")":
-                open_count -= 1
-                if open_count == 0:
-                    return i
-        raise ValueError("Unmatched parenthesis in expression")
-
-    return parse_expression(regex)
-
-# Generate two valid strings from input regex
-regex_input = input("Enter a regular expression: ")
-valid_strings = [generate_strings_from_regex(regex_input) for _ in range(2)]
-print("Generated Strings:")
-for s in valid_strings:
-    print(s)
\ No newline at end of file
+        index += 1
+    return nodes
+
+
+def _build_sequence(nodes):
+    # Merge runs of literals, then join the generators of the remaining pieces
+    parts = []
+    for node in nodes:
+        if node[0] == "lit" and parts and isinstance(parts[-1], str):
+            parts[-1] += node[1]
+        elif node[0] == "lit":
+            parts.append(node[1])
+        else:
+            parts.append(_build(node))
+
+    if not parts:
+        return lambda rng: ""
+    if len(parts) == 1:
+        part = parts[0]
+        return part if callable(part) else lambda rng: part
+    if all(isinstance(part, str) for part in parts):
+        text = "".join(parts)
+        return lambda rng: text
+    return lambda rng: "".join(part if part.__class__ is str else part(rng) for part in parts)
+
+
+def _build(node):
+    kind = node[0]
+    if kind == "lit":
+        text = node[1]
+        return lambda rng: text
+    if kind == "group":
+        return _build_sequence(node[1])
+
+    generate = _build(node[1])
+    if kind == "star":
+        return lambda rng: generate(rng) * rng.randint(0, MAX_REPETITION)
+    if kind == "plus":
+        return lambda rng: generate(rng) * rng.randint(1, MAX_REPETITION)
+    if kind == "opt":
+        return lambda rng: generate(rng) if rng.getrandbits(1) else ""
+    if kind == "alt":
+        options = node[2]
+        count = len(options) + 1
+        def alternative(rng):
+            choice = rng.randrange(count)
+            return generate(rng) if choice == 0 else options[choice - 1]
+        return alternative
+    if kind == "pow":
+        power = node[2]
+        return lambda rng: generate(rng) * power
+    raise ValueError(f"Unknown plan node: {kind}")
+
+
+# Thompson NFA state kinds
+CHAR, EPSILON, SPLIT, MATCH = range(4)
+
+
+class ThompsonNFA:
+    # Membership matcher for a parsed regex. Pieces are read as ordinary
+    # regular operators: every repetition is matched independently and `*` and
+    # `+` are unbounded, so every string the generator can produce is accepted.
+    # Matching simulates all NFA states at once, in O(len(string) * states),
+    # so patterns like (a|a)^30 cannot blow up the way backtracking does.
+    def __init__(self, plan):
+        # Every state is [kind, char, out, out2]; `out`s are filled in later
+        self.states = []
+        start, outs = self._sequence(plan)
+        self._patch(outs, self._new(MATCH))
+        self.start = start
+        self._prepare()
+
+    def _new(self, kind, char=None):
+        self.states.append([kind, char, None, None])
+        return len(self.states) - 1
+
+    def _patch(self, outs, target):
+        for state, field in outs:
+            self.states[state][field] = target
+
+    def _literal(self, text):
+        if not text:
+            state = self._new(EPSILON)
+            return state, [(state, 2)]
+        start = previous = None
+        for char in text:
+            state = self._new(CHAR, char)
+            if previous is None:
+                start = state
+            else:
+                self.states[previous][2] = state
+            previous = state
+        return start, [(previous, 2)]
+
+    def _sequence(self, nodes):
+        if not nodes:
+            return self._literal("")
+        start, outs = self._fragment(nodes[0])
+        for node in nodes[1:]:
+            next_start, next_outs = self._fragment(node)
+            self._patch(outs, next_start)
+            outs = next_outs
+        return start, outs
+
+    def _fragment(self, node):
+        kind = node[0]
+        if kind == "lit":
+            return self._literal(node[1])
+        if kind == "group":
+            return self._sequence(node[1])
+        if kind == "pow":
+            return self._sequence([node[1]] * node[2])
+        if kind == "alt":
+            branches = [self._fragment(node[1])] + [self._literal(option) for option in node[2]]
+            start, outs = branches[0]
+            for branch_start, branch_outs in branches[1:]:
+                split = self._new(SPLIT)
+                self.states[split][2] = start
+                self.states[split][3] = branch_start
+                start = split
+                outs = outs + branch_outs
+            return start, outs
+
+        child_start, child_outs = self._fragment(node[1])
+        split = self._new(SPLIT)
+        self.states[split][2] = child_start
+        if kind == "star":
+            self._patch(child_outs, split)
+            return split, [(split, 3)]
+        if kind == "plus":
+            self._patch(child_outs, split)
+            return child_start, [(split, 3)]
+        if kind == "opt":
+            return split, child_outs + [(split, 3)]
+        raise ValueError(f"Unknown plan node: {kind}")
+
+    def _closure(self, state):
+        # The CHAR and MATCH states reachable through EPSILON/SPLIT edges
+        mask = 0
+        seen = set()
+        stack = [state]
+        while stack:
+            state = stack.pop()
+            if state is None or state in seen:
+                continue
+            seen.add(state)
+            kind, _, out, out2 = self.states[state]
+            if kind == EPSILON:
+                stack.append(out)
+            elif kind == SPLIT:
+                stack.append(out2)
+                stack.append(out)
+            else:
+                mask |= 1 << state
+        return mask
+
+    def _prepare(self):
+        # Bitsets of the CHAR states for each character, of the MATCH state,
+        # and of the closure entered by following each CHAR state
+        self.char_masks = {}
+        self.follow = {}
+        self.match_mask = 0
+        for state, (kind, char, out, _) in enumerate(self.states):
+            if kind == CHAR:
+                self.char_masks[char] = self.char_masks.get(char, 0) | 1 << state
+                self.follow[state] = self._closure(out)
+            elif kind == MATCH:
+                self.match_mask |= 1 << state
+        self.start_mask = self._closure(self.start)
+        self._steps = {}
+
+    def _step(self, mask, char):
+        key = (mask, char)
+        next_mask = self._steps.get(key)
+        if next_mask is None:
+            next_mask = 0
+            active = mask & self.char_masks.get(char, 0)
+            follow = self.follow
+            while active:
+                lowest = active & -active
+                next_mask |= follow[lowest.bit_length() - 1]
+                active ^= lowest
+            # Remembered steps act as a small DFA cache; keep it bounded
+            if len(self._steps) >= 65536:
+                self._steps.clear()
+            self._steps[key] = next_mask
+        return next_mask
+
+    def matches(self, string):
+        mask = self.start_mask
+        step = self._step
+        for char in string:
+            mask = step(mask, char)
+            if not mask:
+                return False
+        return bool(mask & self.match_mask)
+
+
+class CompiledRegex:
+    # A regex parsed once into a plan that can be sampled and matched many times
+    def __init__(self, regex):
+        self.regex = regex
+        self.plan = parse_regex(regex)
+        self._generate = _build_sequence(self.plan)
+        self._nfa = None
+
+    @property
+    def nfa(self):
+        if self._nfa is None:
+            self._nfa = ThompsonNFA(self.plan)
+        return self._nfa
+
+    def matches(self, string):
+        return self.nfa.matches(string)
+
+    def match_many(self, strings):
+        matches = self.nfa.matches
+        return [matches(string) for string in strings]
+
+    def generate(self, rng=random):
+        return self._generate(rng)
+
+    def sample(self, n, seed=None):
+        rng = random.Random(seed)
+        generate = self._generate
+        return [generate(rng) for _ in range(n)]
+
+
+@lru_cache(maxsize=256)
+def compile_regex(regex):
+    return CompiledRegex(regex)
+
+
+# Helper function to parse regex and generate valid strings
+def generate_strings_from_regex(regex):
+    return [compile_regex(regex).generate()]
+
+
+def main():
+    # Generate two valid strings from input regex
+    regex_input = input("Enter a regular expression: ")
+    valid_strings = [generate_strings_from_regex(regex_input) for _ in range(2)]
+    print("Generated Strings:")
+    for s in valid_strings:
+        print(s)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
 from typing import Set, Dict, List
 from collections import defaultdict, deque
 
+# While instrumented, the worklist passes report their work here
+INSTRUMENT = None
+
 class GrammarCNFConverter:
     def __init__(self, non_terminals: Set[str], terminals: Set[str],
                  productions: Dict[str, List[List[str]]], start_symbol: str):
@@ -9,73 +12,114 @@ class GrammarCNFConverter:
         self.P = productions
         self.S = start_symbol
 
+    def _propagate(self, is_base):
+        # Worklist fixpoint shared by the nullable and productive analyses: a
+        # head is marked once every symbol of one of its productions is either
+        # a base symbol or already marked. Each production keeps a count of its
+        # missing symbols, and a reverse index from symbol to the productions
+        # it occurs in means every occurrence is decremented only once.
+        marked = set()
+        worklist = []
+        heads = []
+        missing = []
+        occurrences = defaultdict(list)
+
+        for A in self.P:
+            for prod in self.P[A]:
+                index = len(heads)
+                heads.append(A)
+                count = 0
+                for symbol in prod:
+                    if not is_base(symbol):
+                        occurrences[symbol].append(index)
+                        count += 1
+                missing.append(count)
+                if count == 0 and A not in marked:
+                    marked.add(A)
+                    worklist.append(A)
+
+        if INSTRUMENT is not None:
+            pending = sum(missing)
+        while worklist:
+            symbol = worklist.pop()
+            for index in occurrences.pop(symbol, ()):
+                missing[index] -= 1
+                if missing[index] == 0:
+                    A = heads[index]
+                    if A not in marked:
+                        marked.add(A)
+                        worklist.append(A)
+        if INSTRUMENT is not None:
+            # Every marked symbol is popped once; every decrement settles one
+            # missing symbol of a production
+            INSTRUMENT.count("lab5.worklist_pops", len(marked))
+            INSTRUMENT.count("lab5.count_decrements", pending - sum(missing))
+        return marked
+
     def eliminate_epsilon_productions(self):
-        nullable = set()
-        changed = True
-        while changed:
-            changed = False
-            for A in self.P:
-                for prod in self.P[A]:
-                    if all(symbol in nullable or symbol == 'ε' for symbol in prod):
-                        if A not in nullable:
-                            nullable.add(A)
-                            changed = True
+        nullable = self._propagate(lambda symbol: symbol == 'ε')
 
         new_P = defaultdict(list)
         for A in self.P:
+            seen = set()
             for prod in self.P[A]:
-                options = [[]]
+                # Expand nullable symbols, dropping duplicate partial expansions
+                # as they appear instead of multiplying them
+                options = [()]
                 for symbol in prod:
                     new_options = []
+                    option_set = set()
                     for option in options:
-                        if symbol in nullable:
-                            new_options.append(option[:])  # omit symbol
-                        new_options.append(option + [symbol])  # include symbol
+                        candidates = (option, option + (symbol,)) if symbol in nullable else (option + (symbol,),)
+                        for candidate in candidates:
+                            if candidate not in option_set:
+                                option_set.add(candidate)
+                                new_options.append(candidate)
                     options = new_options
                 for option in options:
-                    if option and option != ['ε']:
-                        new_P[A].append(option)
+                    if option and option != ('ε',) and option not in seen:
+                        seen.add(option)
+                        new_P[A].append(list(option))
         self.P = new_P
 
     def eliminate_unit_productions(self):
-        unit_pairs = set()
+        def is_unit(prod):
+            return len(prod) == 1 and prod[0] in self.VN
+
+        unit_targets = defaultdict(list)
         for A in self.P:
             for prod in self.P[A]:
-                if len(prod) == 1 and prod[0] in self.VN:
-                    unit_pairs.add((A, prod[0]))
-
-        while True:
-            new_pairs = set(unit_pairs)
-            for (A, B) in unit_pairs:
-                for prod in self.P.get(B, []):
-                    if len(prod) == 1 and prod[0] in self.VN:
-                        new_pairs.add((A, prod[0]))
-            if new_pairs == unit_pairs:
-                break
-            unit_pairs = new_pairs
+                if is_unit(prod):
+                    unit_targets[A].append(prod[0])
 
         new_P = defaultdict(list)
         for A in self.P:
-            for prod in self.P[A]:
-                if not (len(prod) == 1 and prod[0] in self.VN):
-                    new_P[A].append(prod)
-        for (A, B) in unit_pairs:
-            for prod in self.P.get(B, []):
-                if not (len(prod) == 1 and prod[0] in self.VN):
-                    new_P[A].append(prod)
+            # Non-unit productions of A, then of everything A reaches through
+            # unit productions, each production kept once
+            seen = set()
+            reached = {A}
+            queue = deque([A])
+            sources = []
+            while queue:
+                B = queue.popleft()
+                sources.append(B)
+                for C in unit_targets.get(B, ()):
+                    if C not in reached:
+                        reached.add(C)
+                        queue.append(C)
+            if INSTRUMENT is not None:
+                INSTRUMENT.count("lab5.unit_closure_visits", len(sources))
+            for B in sources:
+                for prod in self.P.get(B, []):
+                    if not is_unit(prod):
+                        key = tuple(prod)
+                        if key not in seen:
+                            seen.add(key)
+                            new_P[A].append(prod)
         self.P = new_P
 
     def eliminate_non_productive_symbols(self):
-        productive = set()
-        changed = True
-        while changed:
-            changed = False
-            for A in self.P:
-                for prod in self.P[A]:
-                    if all(symbol in productive or symbol in self.VT for symbol in prod):
-                        if A not in productive:
-                            productive.add(A)
-                            changed = True
+        productive = self._propagate(lambda symbol: symbol in self.VT)
 
         self.VN = {A for A in self.VN if A in productive}
         self.P = {A: [prod for prod in self.P[A] if all(symbol in productive or symbol in self.VT for symbol in prod)]
@@ -117,31 +161,42 @@ class GrammarCNFConverter:
                         new_prod.append(symbol)
                 new_productions[A].append(new_prod)
 
-        def binarize(prod):
+        final_productions = defaultdict(list)
+        seen = set()
+
+        def add(A, prod):
+            if (A, tuple(prod)) not in seen:
+                seen.add((A, tuple(prod)))
+                final_productions[A].append(prod)
+
+        # Hash-consed binarization: every distinct right-hand-side suffix gets
+        # exactly one X variable, however many long productions end with it
+        suffix_vars = {}
+
+        def binarize(symbols):
             nonlocal counter
-            if len(prod) <= 2:
-                return [prod]
-            result = []
-            curr = prod[0]
-            for i in range(1, len(prod) - 1):
-                new_var = f"X{counter}"
-                counter += 1
-                self.VN.add(new_var)
-                result.append([curr, new_var])
-                curr = new_var
-            result.append([curr, prod[-1]])
-            return result
+            symbols = tuple(symbols)
+            if symbols in suffix_vars:
+                return suffix_vars[symbols]
+            var = None
+            for start in range(len(symbols) - 2, -1, -1):
+                suffix = symbols[start:]
+                known = suffix_vars.get(suffix)
+                if known is None:
+                    known = f"X{counter}"
+                    counter += 1
+                    self.VN.add(known)
+                    suffix_vars[suffix] = known
+                    add(known, [symbols[start], var] if var else list(suffix))
+                var = known
+            return var
 
-        final_productions = defaultdict(list)
         for A in new_productions:
             for prod in new_productions[A]:
                 if len(prod) <= 2:
-                    final_productions[A].append(prod)
+                    add(A, prod)
                 else:
-                    bins = binarize(prod)
-                    final_productions[A].append(bins[0])
-                    for rule in bins[1:]:
-                        final_productions[rule[0]].append(rule)
+                    add(A, [prod[0], binarize(prod[1:])])
 
         self.P = final_productions
 
@@ -163,6 +218,122 @@ class GrammarCNFConverter:
                 print(f"  {A} → {' '.join(prod)}")
 
 
+class CYKParser:
+    # CYK recognizer/parser over a grammar in Chomsky Normal Form, e.g. the
+    # `P` of a GrammarCNFConverter after convert(). Every chart cell is a
+    # bitset of non-terminals, and cells are combined through per-symbol
+    # tables of binary rules, memoized on the (left, right) cell pair.
+    def __init__(self, productions: Dict[str, List[List[str]]], start_symbol: str,
+                 cache_size: int = 1 << 16):
+        self.start_symbol = start_symbol
+        index = {A: i for i, A in enumerate(productions)}
+        for prods in productions.values():
+            for prod in prods:
+                if len(prod) == 2:
+                    for symbol in prod:
+                        index.setdefault(symbol, len(index))
+        self.non_terminals = list(index)
+        self.index = index
+        self.start_mask = 1 << index[start_symbol] if start_symbol in index else 0
+
+        # terminal -> heads deriving it, and
+        # B -> (mask of every C in some A -> B C, [(C bit, mask of those A)])
+        self.terminal_masks = defaultdict(int)
+        self.binary = defaultdict(lambda: [0, defaultdict(int)])
+        self.rules = defaultdict(list)    # A -> [(B, C)], for building trees
+        for A, prods in productions.items():
+            head = 1 << index[A]
+            for prod in prods:
+                if len(prod) == 1:
+                    self.terminal_masks[prod[0]] |= head
+                elif len(prod) == 2:
+                    B, C = prod
+                    entry = self.binary[index[B]]
+                    entry[0] |= 1 << index[C]
+                    entry[1][1 << index[C]] |= head
+                    self.rules[A].append((B, C))
+                else:
+                    raise ValueError(f"Production {A} → {' '.join(prod)} is not in CNF")
+        self.binary = {B: (rights, list(heads.items())) for B, (rights, heads) in self.binary.items()}
+
+        self.cache_size = cache_size
+        self._combined = {}
+
+    def _combine(self, left, right):
+        key = (left, right)
+        heads = self._combined.get(key)
+        if heads is None:
+            heads = 0
+            binary = self.binary
+            bits = left
+            while bits:
+                lowest = bits & -bits
+                bits ^= lowest
+                entry = binary.get(lowest.bit_length() - 1)
+                if entry is not None and entry[0] & right:
+                    for right_bit, right_heads in entry[1]:
+                        if right & right_bit:
+                            heads |= right_heads
+            if len(self._combined) >= self.cache_size:
+                self._combined.clear()
+            self._combined[key] = heads
+        return heads
+
+    def chart(self, word):
+        # chart[length - 1][start] is the set of non-terminals deriving
+        # word[start:start + length]
+        n = len(word)
+        table = [[self.terminal_masks.get(symbol, 0) for symbol in word]]
+        for length in range(2, n + 1):
+            row = []
+            for start in range(n - length + 1):
+                cell = 0
+                for split in range(1, length):
+                    left = table[split - 1][start]
+                    if not left:
+                        continue
+                    right = table[length - split - 1][start + split]
+                    if right:
+                        cell |= self._combine(left, right)
+                row.append(cell)
+            table.append(row)
+        return table
+
+    def recognize(self, word):
+        if not word:
+            return False
+        return bool(self.chart(word)[-1][0] & self.start_mask)
+
+    def recognize_many(self, words):
+        # The combine cache is shared by the whole batch; repeated words are
+        # only parsed once
+        results = {}
+        return [results[word] if word in results else results.setdefault(word, self.recognize(word))
+                for word in map(tuple, words)]
+
+    def parse(self, word):
+        # A parse tree of nested (A, left, right) / (A, terminal) tuples, or None
+        if not word:
+            return None
+        table = self.chart(word)
+        if not table[-1][0] & self.start_mask:
+            return None
+        index = self.index
+
+        def build(A, start, length):
+            if length == 1:
+                return (A, word[start])
+            for split in range(1, length):
+                left = table[split - 1][start]
+                right = table[length - split - 1][start + split]
+                for B, C in self.rules[A]:
+                    if left >> index[B] & 1 and right >> index[C] & 1:
+                        return (A, build(B, start, split), build(C, start + split, length - split))
+            raise AssertionError("chart and rules disagree")
+
+        return build(self.start_symbol, 0, len(word))
+
+
 def input_grammar():
     print("Enter comma-separated non-terminals (e.g., S,A,B):")
     non_terminals = set(input().strip().split(','))
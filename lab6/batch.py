@@ -0,0 +1,111 @@
+from itertools import chain
+from operator import attrgetter
+
+import numpy as np
+
+from evaluator import SHAPE_ARITY, SHAPE_FORMULAS, compile_node
+from parser import Lexer, Parser, ShapeNode, TokenType
+
+# Columnar evaluation of many parsed statements at once: shape statements are
+# grouped by (shape, operation), the parameters of a group are stacked into one
+# array with a row per statement, each group is computed in a single vectorized
+# call, and the results are scattered back to the positions of the statements.
+# Anything that is not a shape statement with an operation goes through the
+# templates of evaluator.py.
+
+
+def _triangle_area_vec(a, b, c):
+    # Heron's formula; a side longer than the other two together is a math
+    # domain error, as in evaluator._triangle_area
+    s = (a + b + c) / 2
+    product = s * (s - a) * (s - b) * (s - c)
+    if (product < 0).any():
+        raise ValueError("math domain error")
+    return np.sqrt(product)
+
+
+def _trapezoid_perimeter_vec(a, b, h):
+    return a + b + 2 * np.hypot(h, (a - b) / 2)
+
+
+# The formulas of evaluator.SHAPE_FORMULAS over whole parameter columns, keyed
+# by TokenType names
+VECTOR_FORMULAS = {
+    shape_type.name: {operation.name: formula for operation, formula in formulas.items()}
+    for shape_type, formulas in SHAPE_FORMULAS.items()
+}
+VECTOR_FORMULAS[TokenType.TRIANGLE.name][TokenType.AREA.name] = _triangle_area_vec
+VECTOR_FORMULAS[TokenType.TRAPEZOID.name][TokenType.PERIMETER.name] = _trapezoid_perimeter_vec
+
+ARITY = {shape_type.name: arity for shape_type, arity in SHAPE_ARITY.items()}
+
+SCALE = TokenType.SCALE.name
+
+VALUE = attrgetter("value")
+
+
+def evaluate_group(shape_name, operation_name, parameters):
+    # parameters: array of shape (statements, values per statement). Returns
+    # one value per statement, or for scale one row of scaled dimensions
+    if operation_name == SCALE:
+        return parameters[:, :-1] * parameters[:, -1:]
+    if operation_name not in VECTOR_FORMULAS.get(shape_name, {}):
+        raise ValueError(f"Unsupported operation {operation_name} for {shape_name}")
+    return VECTOR_FORMULAS[shape_name][operation_name](*parameters.T)
+
+
+def evaluate_batch(nodes):
+    # The value of every node, in input order. Area and perimeter come back as
+    # floats, scale as a tuple of floats
+    nodes = list(nodes)
+    groups = {}    # (shape name, operation name) -> (statement indices, parameter lists)
+    others = []
+    for i, node in enumerate(nodes):
+        if not isinstance(node, ShapeNode) or node.operation is None:
+            others.append(i)
+            continue
+        key = (node.shape_type.name, node.operation.name)
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = ([], [])
+        group[0].append(i)
+        group[1].append(node.parameters)
+
+    out = np.full(len(nodes), np.nan)
+    scaled = []
+    for (shape_name, operation_name), (indices, parameters) in groups.items():
+        if shape_name not in ARITY:
+            raise ValueError(f"Unknown shape {shape_name}")
+        expected = ARITY[shape_name] + (operation_name == SCALE)
+        if set(map(len, parameters)) != {expected}:
+            bad = next(i for i, values in zip(indices, parameters) if len(values) != expected)
+            raise ValueError(f"{shape_name} {operation_name} expects {expected} parameters, "
+                             f"got {len(nodes[bad].parameters)} (statement {bad})")
+
+        # One flat pass over the NumberNodes of the group, then one row each
+        columns = np.fromiter(map(VALUE, chain.from_iterable(parameters)), dtype=float,
+                              count=len(indices) * expected).reshape(len(indices), expected)
+        values = evaluate_group(shape_name, operation_name, columns)
+        if operation_name == SCALE:
+            scaled.append((indices, map(tuple, values.tolist())))
+        else:
+            out[indices] = values
+
+    results = out.tolist()
+    for indices, values in scaled:
+        for i, value in zip(indices, values):
+            results[i] = value
+    for i in others:
+        results[i] = compile_node(nodes[i])()
+    return results
+
+
+def main():
+    text = input("Enter expression: ")
+    nodes = Parser(Lexer(text).tokenize()).parse()
+    for node, value in zip(nodes, evaluate_batch(nodes)):
+        print(f"  {node} = {value}")
+
+
+if __name__ == "__main__":
+    main()
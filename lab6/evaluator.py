@@ -0,0 +1,247 @@
+import math
+from functools import lru_cache
+
+from parser import *
+
+# Compiles parsed statements into templates that are built once and then called
+# as often as needed. Statements that differ only in their numbers, such as
+# "rectangle: 2 3 area=?" and "rectangle: 5 1 area=?", share one template: a
+# function of those numbers, built once per (shape, operation) form and then
+# called with each statement's values. Function calls only ever take a
+# literal, so they are folded to their value when compiled.
+
+PENTAGON_AREA = math.sqrt(5 * (5 + 2 * math.sqrt(5))) / 4
+
+
+def _triangle_area(a, b, c):
+    # Heron's formula
+    s = (a + b + c) / 2
+    return math.sqrt(s * (s - a) * (s - b) * (s - c))
+
+
+def _trapezoid_perimeter(a, b, h):
+    # Isosceles trapezoid with parallel sides a, b and height h
+    return a + b + 2 * math.hypot(h, (a - b) / 2)
+
+
+# Formulas per shape, taking the shape's dimensions in the order they are written
+SHAPE_FORMULAS = {
+    TokenType.RECTANGLE: {
+        TokenType.AREA: lambda w, h: w * h,
+        TokenType.PERIMETER: lambda w, h: 2 * (w + h),
+    },
+    TokenType.SQUARE: {
+        TokenType.AREA: lambda s: s * s,
+        TokenType.PERIMETER: lambda s: 4 * s,
+    },
+    TokenType.CIRCLE: {
+        TokenType.AREA: lambda r: math.pi * r * r,
+        TokenType.PERIMETER: lambda r: 2 * math.pi * r,
+    },
+    TokenType.TRIANGLE: {
+        TokenType.AREA: _triangle_area,
+        TokenType.PERIMETER: lambda a, b, c: a + b + c,
+    },
+    TokenType.PENTAGON: {
+        TokenType.AREA: lambda s: PENTAGON_AREA * s * s,
+        TokenType.PERIMETER: lambda s: 5 * s,
+    },
+    TokenType.TRAPEZOID: {
+        TokenType.AREA: lambda a, b, h: (a + b) / 2 * h,
+        TokenType.PERIMETER: _trapezoid_perimeter,
+    },
+}
+
+# Number of dimensions each shape is written with
+SHAPE_ARITY = {
+    TokenType.RECTANGLE: 2,
+    TokenType.SQUARE: 1,
+    TokenType.CIRCLE: 1,
+    TokenType.TRIANGLE: 3,
+    TokenType.PENTAGON: 1,
+    TokenType.TRAPEZOID: 3,
+}
+
+# Trigonometric functions take their argument in degrees, as in sin(45);
+# pow(x) is the square of x
+MATH_FUNCTIONS = {
+    TokenType.SIN: lambda x: math.sin(math.radians(x)),
+    TokenType.COS: lambda x: math.cos(math.radians(x)),
+    TokenType.TAN: lambda x: math.tan(math.radians(x)),
+    TokenType.COTAN: lambda x: 1 / math.tan(math.radians(x)),
+    TokenType.LOG: math.log,
+    TokenType.POW: lambda x: x * x,
+    TokenType.SQRT: math.sqrt,
+}
+
+
+def _scale(arity):
+    # scale takes the shape's dimensions followed by the factor, and returns
+    # the scaled dimensions
+    def scale(*parameters):
+        if len(parameters) != arity + 1:
+            raise TypeError(f"scale takes {arity} dimensions and a factor, got {len(parameters)} values")
+        factor = parameters[-1]
+        return tuple(value * factor for value in parameters[:-1])
+    return scale
+
+
+@lru_cache(maxsize=None)
+def shape_function(shape_type, operation):
+    # The formula for one statement template, e.g. rectangle area, to be called
+    # with the parameter values of each statement
+    if shape_type not in SHAPE_FORMULAS:
+        raise ValueError(f"Unknown shape {shape_type}")
+    if operation == TokenType.SCALE:
+        return _scale(SHAPE_ARITY[shape_type])
+    if operation not in SHAPE_FORMULAS[shape_type]:
+        raise ValueError(f"Unsupported operation {operation} for {shape_type.name}")
+    return SHAPE_FORMULAS[shape_type][operation]
+
+
+def math_function(func_type):
+    if func_type not in MATH_FUNCTIONS:
+        raise ValueError(f"Unknown function {func_type}")
+    return MATH_FUNCTIONS[func_type]
+
+
+def template_key(node):
+    # The structure of a statement with its numbers left out, e.g.
+    # ('shape', RECTANGLE, AREA, ('number', 'number')): statements that differ
+    # only in their numbers share a key, and so share one compiled template
+    if isinstance(node, NumberNode):
+        return 'number'
+    if isinstance(node, FunctionCallNode):
+        return ('call', node.func_type, template_key(node.argument))
+    if isinstance(node, ShapeNode):
+        return ('shape', node.shape_type, node.operation, tuple(map(template_key, node.parameters)))
+    raise ValueError(f"Cannot compile {node!r}")
+
+
+def template_parameters(node):
+    # The numbers of a statement, in the order its template takes them
+    if isinstance(node, NumberNode):
+        return (node.value,)
+    if isinstance(node, FunctionCallNode):
+        return template_parameters(node.argument)
+    return tuple(value for parameter in node.parameters for value in template_parameters(parameter))
+
+
+def _identity(value):
+    return value
+
+
+def _dimensions(*values):
+    return values
+
+
+def _width(key):
+    # How many numbers a template takes
+    if key == 'number':
+        return 1
+    if key[0] == 'call':
+        return _width(key[2])
+    return sum(map(_width, key[3]))
+
+
+@lru_cache(maxsize=None)
+def compile_template(key):
+    # A function taking the template's numbers as positional arguments and
+    # returning the statement's value. Built once per key, then called with
+    # the numbers of every statement of that form.
+    if key == 'number':
+        return _identity
+    if key[0] == 'call':
+        func = math_function(key[1])
+        if key[2] == 'number':
+            return func
+        argument = compile_template(key[2])
+        return lambda *values: func(argument(*values))
+
+    _, shape_type, operation, parameter_keys = key
+    if operation is None:
+        # Nothing asked about the shape, so it evaluates to its dimensions
+        func = _dimensions
+    else:
+        func = shape_function(shape_type, operation)
+        expected = SHAPE_ARITY[shape_type] + (operation == TokenType.SCALE)
+        if len(parameter_keys) != expected:
+            raise ValueError(f"{shape_type.name} {operation.name} expects {expected} parameters, "
+                             f"got {len(parameter_keys)}")
+    if all(parameter_key == 'number' for parameter_key in parameter_keys):
+        return func
+
+    # Some parameters are expressions: each takes its own slice of the numbers
+    parts = []
+    offset = 0
+    for parameter_key in parameter_keys:
+        width = _width(parameter_key)
+        parts.append((compile_template(parameter_key), offset, offset + width))
+        offset += width
+    return lambda *values: func(*[part(*values[start:end]) for part, start, end in parts])
+
+
+def _fold(template, values):
+    # A literal call evaluated once, now. An error such as log(0) is kept and
+    # raised when the statement is evaluated, so compiling never fails on it
+    try:
+        value = template(*values)
+    except (ArithmeticError, ValueError) as error:
+        failure = error
+
+        def fail():
+            raise failure.with_traceback(None)
+        return fail
+    return lambda: value
+
+
+def _bind(node, template, values):
+    if isinstance(node, FunctionCallNode):
+        return _fold(template, values)
+    return lambda: template(*values)
+
+
+def compile_node(node):
+    # A closure taking no arguments that evaluates the node with its own
+    # numbers; function calls are folded to a constant
+    return _bind(node, compile_template(template_key(node)), template_parameters(node))
+
+
+class CompiledProgram:
+    # A parsed program compiled to one template per statement. Calling it
+    # evaluates every statement with the numbers it was parsed with, or with
+    # `parameters`: one tuple of numbers per statement, in template order
+    # (see template_parameters), so the same program can be re-run on new
+    # values without parsing or compiling again. With the parsed numbers,
+    # function calls give the value they were folded to.
+    def __init__(self, nodes):
+        self.templates = [compile_template(template_key(node)) for node in nodes]
+        self.parameters = [template_parameters(node) for node in nodes]
+        self.statements = [_bind(node, template, values)
+                           for node, template, values in zip(nodes, self.templates, self.parameters)]
+
+    def __len__(self):
+        return len(self.templates)
+
+    def __call__(self, parameters=None):
+        if parameters is None:
+            return [statement() for statement in self.statements]
+        if len(parameters) != len(self.templates):
+            raise ValueError(f"Expected parameters for {len(self.templates)} statements, got {len(parameters)}")
+        return [template(*values) for template, values in zip(self.templates, parameters)]
+
+
+def compile_program(nodes):
+    return CompiledProgram(nodes)
+
+
+def main():
+    text = input("Enter expression: ")
+    nodes = Parser(Lexer(text).tokenize()).parse()
+    program = compile_program(nodes)
+    for node, value in zip(nodes, program()):
+        print(f"  {node} = {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,7 @@
+from array import array
+from bisect import bisect_right
 from enum import Enum, auto
+import mmap
 import re
 import cmath
 import math
@@ -39,94 +42,540 @@ class TokenType(Enum):
     SQRT = auto()
 
 
+# Regex patterns for token types, tried in order (the first one that matches wins)
+TOKEN_PATTERNS = [
+    (TokenType.FLOAT, r'\d+\.\d+'),
+    (TokenType.IMAGINARY, r'\d+(\.\d+)?i'),
+    (TokenType.INTEGER, r'\d+'),
+    (TokenType.PLUS, r'\+'),
+    (TokenType.MINUS, r'-'),
+    (TokenType.MULTIPLY, r'\*'),
+    (TokenType.DIVIDE, r'/'),
+    (TokenType.EQUALS, r'='),
+    (TokenType.QUESTION, r'\?'),
+    (TokenType.OPEN_PAREN, r'\('),
+    (TokenType.CLOSE_PAREN, r'\)'),
+    # Shapes
+    (TokenType.RECTANGLE, r'rectangle'),
+    (TokenType.SQUARE, r'square'),
+    (TokenType.CIRCLE, r'circle'),
+    (TokenType.TRIANGLE, r'triangle'),
+    (TokenType.PENTAGON, r'pentagon'),
+    (TokenType.TRAPEZOID, r'trapezoid'),
+    # Operations
+    (TokenType.AREA, r'area'),
+    (TokenType.PERIMETER, r'perimeter'),
+    (TokenType.SCALE, r'scale'),
+    # Math functions
+    (TokenType.SIN, r'sin'),
+    (TokenType.COS, r'cos'),
+    (TokenType.TAN, r'tan'),
+    (TokenType.COTAN, r'cotan'),
+    (TokenType.LOG, r'log'),
+    (TokenType.POW, r'pow'),
+    (TokenType.SQRT, r'sqrt'),
+]
+
+# Whitespace and colons separate tokens and are skipped
+SKIP_PATTERN = r'[ \t\n:]+'
+
+# While instrumented, tokenize() reports its matches per pattern here
+INSTRUMENT = None
+
+# Compiled scanners, one per pattern table, shared by every Lexer in the process
+_scanner_cache = {}
+
+
+# No token contains one of these characters except as the whole token, so the
+# input up to one of them can be scanned without seeing what comes after it
+BOUNDARY_CHARS = ' \t\n:+-*/=?()'
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+
+def compile_patterns(patterns, binary=False):
+    # Combine the whole pattern table into one alternation with a named group
+    # per entry. Python tries the branches left to right, so the first pattern
+    # in the table still wins, exactly like trying the patterns one by one.
+    # With binary=True the scanner works on bytes, mmaps and other buffers.
+    key = (tuple(patterns), binary)
+    scanner = _scanner_cache.get(key)
+    if scanner is None:
+        parts = [f'(?P<SKIP>{SKIP_PATTERN})']
+        group_types = {}
+        for index, (token_type, pattern) in enumerate(patterns):
+            name = f'T{index}'
+            parts.append(f'(?P<{name}>{pattern})')
+            group_types[name] = token_type
+        source = '|'.join(parts)
+        scanner = (re.compile(source.encode('ascii') if binary else source), group_types)
+        _scanner_cache[key] = scanner
+    return scanner
+
+
+def convert_value(token_type, value):
+    # Convert the matched text based on token type
+    if token_type == TokenType.INTEGER:
+        return int(value)
+    if token_type == TokenType.FLOAT:
+        return float(value)
+    if token_type == TokenType.IMAGINARY:
+        # Remove 'i' and convert to complex
+        return complex(0, float(value[:-1]))
+    return value
+
+
+class LexError(ValueError):
+    # Input that does not lex; `position` is where scanning got stuck
+    def __init__(self, message, position=None):
+        super().__init__(message)
+        self.position = position
+
+
 class Token:
-    def __init__(self, type, value):
+    __slots__ = ('type', 'value', 'start', 'end')
+
+    def __init__(self, type, value, start=None, end=None):
         self.type = type
         self.value = value
+        # Offsets of the token in the input, when the lexer knows them
+        self.start = start
+        self.end = end
 
     def __repr__(self):
         return f"Token({self.type}, {repr(self.value)})"
 
+
+def scan(scanner, group_types, text, pos=0, end=None, offset=0):
+    # Yield the tokens of text[pos:end], matching in place without slicing
+    # off the rest of the input. `offset` is added to the reported positions
+    # when `text` is only a window of a larger input.
+    match = scanner.match
+    binary = not isinstance(text, str)
+    if end is None:
+        end = len(text)
+
+    while pos < end:
+        m = match(text, pos, end)
+        if m is None:
+            rest = text[pos:end]
+            if binary:
+                rest = bytes(rest[:80]).decode('ascii', 'replace')
+            raise LexError(f"Invalid token at position {offset + pos}: '{rest}'", offset + pos)
+
+        group = m.lastgroup
+        if group != 'SKIP':
+            token_type = group_types[group]
+            value = m.group()
+            if binary:
+                value = value.decode('ascii')
+            yield Token(token_type, convert_value(token_type, value), offset + pos, offset + m.end())
+        pos = m.end()
+
+
+def _read_chunks(file, chunk_size):
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_tokens(source, chunk_size=DEFAULT_CHUNK_SIZE, patterns=TOKEN_PATTERNS):
+    # Lazily tokenize a string, a bytes-like object, an mmap, a file object
+    # (text or binary) or an iterable of str/bytes chunks. Every token carries
+    # its absolute start/end offset (characters for text input, bytes for
+    # binary input).
+    if isinstance(source, (str, bytes, bytearray, memoryview, mmap.mmap)):
+        # Already addressable as a whole, so scan it in place without copying
+        scanner, group_types = compile_patterns(patterns, binary=not isinstance(source, str))
+        yield from scan(scanner, group_types, source)
+        return
+
+    chunks = _read_chunks(source, chunk_size) if hasattr(source, 'read') else source
+    scanner = group_types = boundaries = None
+    buffer = None
+    offset = 0  # absolute offset of buffer[0]
+
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if buffer is None:
+            binary = not isinstance(chunk, str)
+            scanner, group_types = compile_patterns(patterns, binary=binary)
+            boundaries = [c.encode('ascii') if binary else c for c in BOUNDARY_CHARS]
+            buffer = chunk
+        else:
+            buffer += chunk
+
+        # Only scan up to the last boundary character: a token cut in half by
+        # the chunk split (e.g. a FLOAT split at the '.') stays in the buffer
+        # until the next chunk completes it
+        cut = max(map(buffer.rfind, boundaries)) + 1
+        if cut:
+            yield from scan(scanner, group_types, buffer, 0, cut, offset)
+            offset += cut
+            buffer = buffer[cut:]
+
+    if buffer:
+        yield from scan(scanner, group_types, buffer, 0, len(buffer), offset)
+
+
+# Every token type by its code in a TokenBuffer
+TOKEN_TYPES = list(TokenType)
+TYPE_CODES = {token_type: code for code, token_type in enumerate(TOKEN_TYPES)}
+
+
+def compile_buffer_scanner(patterns, binary=False):
+    # The combined scanner plus a catch-all ERROR branch, so finditer() never
+    # silently jumps over an invalid character. Returns the regex and the
+    # type code of each group number (None for SKIP, -1 for ERROR).
+    key = ('buffer', tuple(patterns), binary)
+    scanner = _scanner_cache.get(key)
+    if scanner is None:
+        regex, group_types = compile_patterns(patterns, binary)
+        source = regex.pattern + (b'|(?P<ERROR>(?s:.))' if binary else '|(?P<ERROR>(?s:.))')
+        regex = re.compile(source)
+        group_codes = [None] * (regex.groups + 1)
+        for name, number in regex.groupindex.items():
+            if name == 'ERROR':
+                group_codes[number] = -1
+            elif name != 'SKIP':
+                group_codes[number] = TYPE_CODES[group_types[name]]
+        scanner = (regex, group_codes)
+        _scanner_cache[key] = scanner
+    return scanner
+
+
+class TokenBuffer:
+    # Struct-of-arrays token list: one type code byte and two offsets per
+    # token instead of a Token object and its converted value. The value is
+    # only converted from the source text when it is asked for. Indexing
+    # gives a TokenView, so a TokenBuffer can be handed to Parser as is.
+    def __init__(self, text, patterns=TOKEN_PATTERNS):
+        self.text = text
+        self.binary = not isinstance(text, str)
+        regex, group_codes = compile_buffer_scanner(patterns, self.binary)
+        offset_code = 'i' if len(text) < 1 << 31 else 'q'
+        self.types = array('B')
+        self.starts = array(offset_code)
+        self.ends = array(offset_code)
+        self._last_view = None
+
+        add_type = self.types.append
+        add_start = self.starts.append
+        add_end = self.ends.append
+        for m in regex.finditer(text):
+            code = group_codes[m.lastindex]
+            if code is None:
+                continue
+            start, end = m.span()
+            if code < 0:
+                rest = text[start:]
+                if self.binary:
+                    rest = bytes(rest[:80]).decode('ascii', 'replace')
+                raise LexError(f"Invalid token at position {start}: '{rest}'", start)
+            add_type(code)
+            add_start(start)
+            add_end(end)
+
+    def __len__(self):
+        return len(self.types)
+
+    def __getitem__(self, index):
+        # Parser looks at the same token several times in a row, so the last
+        # view is kept and handed out again
+        view = self._last_view
+        if view is not None and view.index == index:
+            return view
+        if isinstance(index, slice):
+            return [TokenView(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("token index out of range")
+        view = self._last_view = TokenView(self, index)
+        return view
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield TokenView(self, index)
+
+    def type(self, index):
+        return TOKEN_TYPES[self.types[index]]
+
+    def text_of(self, index):
+        text = self.text[self.starts[index]:self.ends[index]]
+        return bytes(text).decode('ascii') if self.binary else text
+
+    def value(self, index):
+        return convert_value(TOKEN_TYPES[self.types[index]], self.text_of(index))
+
+    def nbytes(self):
+        # Memory held by the token arrays themselves, not counting the source
+        return sum(column.itemsize * len(column) for column in (self.types, self.starts, self.ends))
+
+
+class TokenView:
+    # A Token-like window onto one entry of a TokenBuffer; the value is only
+    # converted when it is read
+    __slots__ = ('buffer', 'index', 'type')
+
+    def __init__(self, buffer, index):
+        self.buffer = buffer
+        self.index = index
+        self.type = TOKEN_TYPES[buffer.types[index]]
+
+    @property
+    def value(self):
+        return self.buffer.value(self.index)
+
+    @property
+    def start(self):
+        return self.buffer.starts[self.index]
+
+    @property
+    def end(self):
+        return self.buffer.ends[self.index]
+
+    def __repr__(self):
+        return f"Token({self.type}, {repr(self.value)})"
+
+
+# No pattern looks further than this many characters past the start of the
+# text it matches (the longest keyword) or two past its end (a FLOAT or
+# IMAGINARY attempt after the digits of an INTEGER), so tokens that start this
+# far before an edit cannot change
+RELEX_MARGIN = 16
+
+
+class IncrementalLexer:
+    # Keeps the tokens of a document up to date while it is edited. An edit
+    # re-scans from a token boundary just before it until the new tokens line
+    # up with the old ones again, and splices the re-scanned tokens in. Tokens
+    # are kept in blocks with a pending offset shift per block, and the text
+    # in pieces, so neither the tokens nor the text after an edit are copied:
+    # an edit costs time for the text around it plus one step per block.
+    BLOCK_SIZE = 512
+    PIECE_SIZE = 1 << 16
+
+    def __init__(self, text, patterns=TOKEN_PATTERNS):
+        self.patterns = list(patterns)
+        self.scanner, self.group_types = compile_patterns(self.patterns)
+        self.blocks = self._chunk(list(scan(self.scanner, self.group_types, text)))
+        self.shifts = [0] * len(self.blocks)
+        self.pieces = [text[i:i + self.PIECE_SIZE] for i in range(0, len(text), self.PIECE_SIZE)] or ['']
+        self.piece_starts = list(range(0, max(len(text), 1), self.PIECE_SIZE))
+        self.length = len(text)
+
+    @property
+    def text(self):
+        return ''.join(self.pieces)
+
+    def text_slice(self, start, end):
+        # text[start:end] without joining the whole document
+        start, end = max(start, 0), min(end, self.length)
+        if start >= end:
+            return ''
+        first = bisect_right(self.piece_starts, start) - 1
+        last = bisect_right(self.piece_starts, end - 1) - 1
+        joined = ''.join(self.pieces[first:last + 1])
+        base = self.piece_starts[first]
+        return joined[start - base:end - base]
+
+    def _replace_text(self, offset, deleted, inserted):
+        first = bisect_right(self.piece_starts, offset) - 1
+        last = max(bisect_right(self.piece_starts, offset + deleted - 1) - 1, first)
+        base = self.piece_starts[first]
+        joined = ''.join(self.pieces[first:last + 1])
+        joined = joined[:offset - base] + inserted + joined[offset + deleted - base:]
+        size = self.PIECE_SIZE
+        pieces = [joined[i:i + size] for i in range(0, len(joined), size)] or ['']
+        self.pieces[first:last + 1] = pieces
+        self.piece_starts[first:last + 1] = [base + i * size for i in range(len(pieces))]
+        delta = len(inserted) - deleted
+        for p in range(first + len(pieces), len(self.piece_starts)):
+            self.piece_starts[p] += delta
+        self.length += delta
+
+    def _chunk(self, tokens):
+        size = self.BLOCK_SIZE
+        return [tokens[i:i + size] for i in range(0, len(tokens), size)]
+
+    def _normalize(self, b):
+        # Apply the pending shift of block b to its tokens
+        shift = self.shifts[b]
+        if shift:
+            for token in self.blocks[b]:
+                token.start += shift
+                token.end += shift
+            self.shifts[b] = 0
+        return self.blocks[b]
+
+    def _locate(self, pos):
+        # (block, index) of the last token starting at or before pos, or None
+        blocks, shifts = self.blocks, self.shifts
+        b = bisect_right(range(len(blocks)), pos, key=lambda b: blocks[b][0].start + shifts[b]) - 1
+        if b < 0:
+            return None
+        i = bisect_right(self._normalize(b), pos, key=lambda token: token.start) - 1
+        return b, i
+
+    def __len__(self):
+        return sum(map(len, self.blocks))
+
+    def tokens(self):
+        return [token for b in range(len(self.blocks)) for token in self._normalize(b)]
+
+    def tokens_between(self, start, end):
+        # Tokens overlapping text[start:end], e.g. the visible part of the document
+        found = self._locate(start)
+        b, i = found if found else (0, 0)
+        result = []
+        while b < len(self.blocks):
+            block = self._normalize(b)
+            while i < len(block):
+                token = block[i]
+                if token.start >= end:
+                    return result
+                if token.end > start:
+                    result.append(token)
+                i += 1
+            b, i = b + 1, 0
+        return result
+
+    def _following(self, offset, deleted):
+        # The old tokens that start after the deleted text, as (block, index,
+        # start), in order
+        found = self._locate(offset + deleted - 1)
+        b, i = found if found else (0, -1)
+        i += 1
+        while b < len(self.blocks):
+            block, shift = self.blocks[b], self.shifts[b]
+            while i < len(block):
+                start = block[i].start + shift
+                if start >= offset + deleted:
+                    yield b, i, start
+                i += 1
+            b, i = b + 1, 0
+
+    def _rescan(self, restart, offset, deleted, inserted):
+        # Scan a window of the new text from `restart`, widening it until the
+        # new tokens meet an old token. Returns the new tokens and the
+        # (block, index) of the first old token to keep, or None.
+        delta = len(inserted) - deleted
+        edit_end = offset + len(inserted)
+        extra = 4 * RELEX_MARGIN
+        while True:
+            stop = min(offset + deleted + extra, self.length)
+            window = self.text_slice(restart, offset) + inserted + self.text_slice(offset + deleted, stop)
+            complete = stop == self.length
+            # Tokens ending this close to a cut window may continue past it
+            limit = restart + len(window) - (0 if complete else RELEX_MARGIN)
+
+            old = self._following(offset, deleted)
+            candidate = next(old, None)
+            new_tokens = []
+            try:
+                for token in scan(self.scanner, self.group_types, window, 0, len(window), restart):
+                    if token.end > limit:
+                        break
+                    if token.start >= edit_end:
+                        # Past the edit, the old and new text are the same, so
+                        # once a new token starts where an old one did, the
+                        # rest is unchanged
+                        while candidate is not None and candidate[2] + delta < token.start:
+                            candidate = next(old, None)
+                        if candidate is not None and candidate[2] + delta == token.start:
+                            return new_tokens, candidate[:2]
+                    new_tokens.append(token)
+                else:
+                    if complete:
+                        return new_tokens, None
+            except LexError as error:
+                if complete or error.position < limit:
+                    raise
+            extra *= 4
+
+    def edit(self, offset, deleted, inserted):
+        # Replace text[offset:offset + deleted] with `inserted`. Returns the
+        # re-scanned tokens. If the new text does not lex, LexError is raised
+        # and nothing changes.
+        if offset < 0 or deleted < 0 or offset + deleted > self.length:
+            raise ValueError(f"Edit ({offset}, {deleted}) is outside the text of length {self.length}")
+        delta = len(inserted) - deleted
+
+        found = self._locate(offset - RELEX_MARGIN)
+        if found is None:
+            first_b, first_i, restart = 0, 0, 0
+        else:
+            first_b, first_i = found
+            restart = self.blocks[first_b][first_i].start
+        new_tokens, resync = self._rescan(restart, offset, deleted, inserted)
+
+        prefix = self._normalize(first_b)[:first_i] if self.blocks else []
+        if resync is None:
+            last_b, suffix = len(self.blocks) - 1, []
+        else:
+            last_b, last_i = resync
+            suffix = self._normalize(last_b)[last_i:]
+            for token in suffix:
+                token.start += delta
+                token.end += delta
+            for b in range(last_b + 1, len(self.blocks)):
+                self.shifts[b] += delta
+
+        spliced = self._chunk(prefix + new_tokens + suffix)
+        self.blocks[first_b:last_b + 1] = spliced
+        self.shifts[first_b:last_b + 1] = [0] * len(spliced)
+        self._replace_text(offset, deleted, inserted)
+        return new_tokens
+
+
+def derive_pattern_attempts(tokens, length, patterns):
+    # Python's re does not say which branches of the combined scanner it
+    # tried, so attempts are not measured; they are derived. Branches are
+    # tried in table order, so a token won by pattern k implies that patterns
+    # 0..k were each tried once at its position, SKIP first, and every gap
+    # between tokens is one SKIP match. The match counts are exact, the
+    # attempt counts follow from them. A type that appears twice in the
+    # table is credited to its first pattern.
+    wins = {}
+    skips = 0
+    pos = 0
+    for token in tokens:
+        if token.start != pos:
+            skips += 1
+        wins[token.type] = wins.get(token.type, 0) + 1
+        pos = token.end
+    if pos != length:
+        skips += 1
+    remaining = skips + len(tokens)
+    for label, won in [('SKIP', skips)] + [(token_type.name, wins.pop(token_type, 0)) for token_type, _ in patterns]:
+        INSTRUMENT.count(f"lab6.derived_attempts.{label}", remaining)
+        INSTRUMENT.count(f"lab6.matches.{label}", won)
+        remaining -= won
+
+
 class Lexer:
     def __init__(self, text):
         self.text = text
         self.pos = 0
         self.current_char = self.text[self.pos] if self.text else None
         
-        # Define regex patterns for token types
-        self.patterns = [
-            (TokenType.FLOAT, r'\d+\.\d+'),
-            (TokenType.IMAGINARY, r'\d+(\.\d+)?i'),
-            (TokenType.INTEGER, r'\d+'),
-            (TokenType.PLUS, r'\+'),
-            (TokenType.MINUS, r'-'),
-            (TokenType.MULTIPLY, r'\*'),
-            (TokenType.DIVIDE, r'/'),
-            (TokenType.EQUALS, r'='),
-            (TokenType.QUESTION, r'\?'),
-            (TokenType.OPEN_PAREN, r'\('),
-            (TokenType.CLOSE_PAREN, r'\)'),
-            # Shapes
-            (TokenType.RECTANGLE, r'rectangle'),
-            (TokenType.SQUARE, r'square'),
-            (TokenType.CIRCLE, r'circle'),
-            (TokenType.TRIANGLE, r'triangle'),
-            (TokenType.PENTAGON, r'pentagon'),
-            (TokenType.TRAPEZOID, r'trapezoid'),
-            # Operations
-            (TokenType.AREA, r'area'),
-            (TokenType.PERIMETER, r'perimeter'),
-            (TokenType.SCALE, r'scale'),
-            # Math functions
-            (TokenType.SIN, r'sin'),
-            (TokenType.COS, r'cos'),
-            (TokenType.TAN, r'tan'),
-            (TokenType.COTAN, r'cotan'),
-            (TokenType.LOG, r'log'),
-            (TokenType.POW, r'pow'),
-            (TokenType.SQRT, r'sqrt'),
-        ]
+        # Regex patterns for token types
+        self.patterns = list(TOKEN_PATTERNS)
 
     def tokenize(self):
-        tokens = []
-        pos = 0
-        
-        while pos < len(self.text):
-            # Skip whitespace and colons
-            match = re.match(r'[ \t\n:]+', self.text[pos:])
-            if match:
-                pos += match.end()
-                continue
-                
-            # Try to match a token
-            matched = False
-            for token_type, pattern in self.patterns:
-                regex = re.compile(pattern)
-                match = regex.match(self.text[pos:])
-                
-                if match:
-                    value = match.group(0)
-                    
-                    # Convert value based on token type
-                    if token_type == TokenType.INTEGER:
-                        value = int(value)
-                    elif token_type == TokenType.FLOAT:
-                        value = float(value)
-                    elif token_type == TokenType.IMAGINARY:
-                        # Remove 'i' and convert to complex
-                        num = value[:-1]  # Remove 'i'
-                        value = complex(0, float(num))
-                    
-                    tokens.append(Token(token_type, value))
-                    pos += match.end()
-                    matched = True
-                    break
-            
-            if not matched:
-                raise ValueError(f"Invalid token at position {pos}: '{self.text[pos:]}'")
-        
+        scanner, group_types = compile_patterns(self.patterns)
+        tokens = list(scan(scanner, group_types, self.text))
+        if INSTRUMENT is not None:
+            derive_pattern_attempts(tokens, len(self.text), self.patterns)
         return tokens
 
+    def tokenize_compact(self):
+        return TokenBuffer(self.text, self.patterns)
+
     # Keep the old methods for backward compatibility
     def advance(self):
         self.pos += 1
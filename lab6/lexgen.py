@@ -0,0 +1,323 @@
+import importlib.util
+import os
+import sys
+
+from lexer import *
+
+
+def _import_lab2():
+    # lab2 is a script in its own directory, not a package, so it is loaded
+    # from its file and registered as the module `lab2`; sys.path is left
+    # alone, and a lab2 that is already imported is reused
+    if "lab2" in sys.modules:
+        return sys.modules["lab2"]
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lab2", "lab2.py")
+    spec = importlib.util.spec_from_file_location("lab2", path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["lab2"] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules["lab2"]
+        raise
+    return module
+
+
+lab2 = _import_lab2()
+DEAD, FiniteAutomaton = lab2.DEAD, lab2.FiniteAutomaton
+
+# Table-driven lexer generator. The token table (SKIP first, then the
+# patterns in order) is turned into one position automaton (Glushkov), which
+# has no ε-moves and so fits lab2's FiniteAutomaton as is. Characters are
+# grouped into classes that no pattern tells apart, so the automaton's alphabet
+# is the class numbers. lab2's subset construction makes it deterministic, and
+# every DFA state is tagged with the highest-priority pattern it accepts.
+#
+# The regex scanner tries the patterns in order and keeps the first one that
+# matches at all, with that pattern's own longest match (e.g. "2.5i" is a
+# FLOAT, because FLOAT comes before IMAGINARY). The table scanner reproduces
+# this by running the DFA until it dies and keeping the best tag it saw,
+# together with the last position where that tag accepted.
+
+ESCAPES = {'d': set('0123456789'), 't': {'\t'}, 'n': {'\n'}}
+
+
+class _PatternParser:
+    # Parses the regex subset used by the token table (literals, escapes,
+    # \d, [...] classes, groups, |, *, + and ?) into a tree of
+    # ('chars', set), ('cat', a, b), ('alt', a, b), ('star' / 'plus' / 'opt', a)
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.pos = 0
+
+    def error(self, message):
+        return ValueError(f"{message} at position {self.pos} in pattern {self.pattern!r}")
+
+    def peek(self):
+        return self.pattern[self.pos] if self.pos < len(self.pattern) else None
+
+    def parse(self):
+        node = self.alternation()
+        if self.pos != len(self.pattern):
+            raise self.error("Unexpected ')'")
+        return node
+
+    def alternation(self):
+        node = self.sequence()
+        while self.peek() == '|':
+            self.pos += 1
+            node = ('alt', node, self.sequence())
+        return node
+
+    def sequence(self):
+        node = None
+        while self.peek() not in (None, '|', ')'):
+            atom = self.repeat()
+            node = atom if node is None else ('cat', node, atom)
+        if node is None:
+            raise self.error("Empty pattern")
+        return node
+
+    def repeat(self):
+        node = self.atom()
+        while self.peek() in ('*', '+', '?'):
+            node = ({'*': 'star', '+': 'plus', '?': 'opt'}[self.peek()], node)
+            self.pos += 1
+        return node
+
+    def atom(self):
+        char = self.peek()
+        self.pos += 1
+        if char == '(':
+            node = self.alternation()
+            if self.peek() != ')':
+                raise self.error("Missing ')'")
+            self.pos += 1
+            return node
+        if char == '[':
+            return ('chars', self.char_class())
+        if char == '\\':
+            return ('chars', self.escape())
+        if char in '*+?{}^$.':
+            raise self.error(f"Unsupported syntax {char!r}")
+        return ('chars', {char})
+
+    def escape(self):
+        char = self.peek()
+        if char is None:
+            raise self.error("Dangling '\\'")
+        self.pos += 1
+        if char in ESCAPES:
+            return set(ESCAPES[char])
+        if char.isalnum():
+            raise self.error(f"Unsupported escape \\{char}")
+        return {char}
+
+    def char_class(self):
+        chars = set()
+        if self.peek() == '^':
+            raise self.error("Negated classes are not supported")
+        while self.peek() != ']':
+            char = self.peek()
+            if char is None:
+                raise self.error("Missing ']'")
+            self.pos += 1
+            if char == '\\':
+                chars |= self.escape()
+            elif self.peek() == '-' and self.pos + 1 < len(self.pattern) and self.pattern[self.pos + 1] != ']':
+                last = self.pattern[self.pos + 1]
+                self.pos += 2
+                chars |= {chr(code) for code in range(ord(char), ord(last) + 1)}
+            else:
+                chars.add(char)
+        self.pos += 1
+        return chars
+
+
+def _positions(node, charsets):
+    # Glushkov sets for a pattern tree: (nullable, first, last, follow pairs).
+    # Every 'chars' leaf becomes a position, numbered by its index in charsets
+    kind = node[0]
+    if kind == 'chars':
+        position = len(charsets)
+        charsets.append(frozenset(node[1]))
+        return False, {position}, {position}, []
+    if kind in ('star', 'plus', 'opt'):
+        nullable, first, last, follow = _positions(node[1], charsets)
+        if kind != 'opt':
+            follow = follow + [(p, first) for p in last]
+        return nullable or kind != 'plus', first, last, follow
+    a_nullable, a_first, a_last, a_follow = _positions(node[1], charsets)
+    b_nullable, b_first, b_last, b_follow = _positions(node[2], charsets)
+    if kind == 'alt':
+        return a_nullable or b_nullable, a_first | b_first, a_last | b_last, a_follow + b_follow
+    follow = a_follow + b_follow + [(p, b_first) for p in a_last]
+    first = a_first | b_first if a_nullable else a_first
+    last = a_last | b_last if b_nullable else b_last
+    return a_nullable and b_nullable, first, last, follow
+
+
+def build_nfa(patterns=TOKEN_PATTERNS):
+    # The combined position automaton of SKIP and the token patterns. Returns
+    # the FiniteAutomaton over character class numbers, a bytes table from
+    # byte value to class for bytes.translate, the token type of every tag
+    # (None for SKIP) and the tag of every final state.
+    charsets = []
+    starts = []
+    follows = {}
+    final_tags = {}
+    token_types = [None] + [token_type for token_type, _ in patterns]
+    for tag, pattern in enumerate([SKIP_PATTERN] + [pattern for _, pattern in patterns]):
+        nullable, first, last, follow = _positions(_PatternParser(pattern).parse(), charsets)
+        if nullable:
+            raise ValueError(f"Pattern {pattern!r} matches the empty string")
+        starts.extend(first)
+        for position, targets in follow:
+            follows.setdefault(position, set()).update(targets)
+        for position in last:
+            final_tags[position + 1] = tag
+
+    # Characters that belong to exactly the same charsets form one class.
+    # Characters in none of them, including every non-ASCII byte, share a
+    # class that has no transitions
+    signatures = {frozenset(): 0}
+    class_of = bytearray(256)
+    for code in range(128):
+        signature = frozenset(i for i, chars in enumerate(charsets) if chr(code) in chars)
+        class_of[code] = signatures.setdefault(signature, len(signatures))
+    class_of = bytes(class_of)
+    classes_of_position = [
+        sorted({class_of[ord(char)] for char in chars if ord(char) < 128}) for chars in charsets
+    ]
+
+    # State 0 is the start, state p + 1 is position p
+    states = list(range(len(charsets) + 1))
+    transitions = {}
+    for source, targets in [(0, starts)] + [(p + 1, follows.get(p, ())) for p in range(len(charsets))]:
+        moves = {}
+        for target in sorted(targets):
+            for symbol in classes_of_position[target]:
+                moves.setdefault(symbol, []).append(target + 1)
+        if moves:
+            transitions[source] = moves
+    fa = FiniteAutomaton(states, list(range(len(signatures))), transitions, 0, list(final_tags))
+    return fa, class_of, token_types, final_tags
+
+
+def _imaginary(text):
+    return complex(0, float(text[:-1]))
+
+
+# Value conversion per token type, as in convert_value
+CONVERTERS = {TokenType.INTEGER: int, TokenType.FLOAT: float, TokenType.IMAGINARY: _imaginary}
+
+
+class TableLexer:
+    # Dense-table scanner generated from a token table; produces the same
+    # tokens (types, values and offsets) as Lexer(text).tokenize()
+    def __init__(self, patterns=TOKEN_PATTERNS):
+        fa, self.class_of, self.token_types, final_tags = build_nfa(patterns)
+        self.dfa = fa.convert_ndfa_to_dfa()
+        self.no_tag = no_tag = len(self.token_types)
+
+        # Tag of every DFA state: the lowest tag among its final NFA states
+        nfa_states = self.dfa.nfa_states
+        tags = []
+        for subset in self.dfa.subsets:
+            state_tags = [final_tags[state] for i, state in enumerate(nfa_states)
+                          if subset >> i & 1 and state in final_tags]
+            tags.append(min(state_tags, default=no_tag))
+        self._build_table(tags)
+
+    def _build_table(self, tags):
+        # Priority tagging on top of the DFA: a scanner state is a DFA state
+        # plus the best tag accepted so far in the current token. It accepts
+        # when its DFA state's tag is that best tag, so the last accepting
+        # state seen decides the token. Moves into DFA states that can no
+        # longer reach a tag at least as good are dropped, which ends the
+        # token early (e.g. "2.5" followed by "i" stops at FLOAT).
+        dfa, no_tag = self.dfa, self.no_tag
+        width = dfa.width
+
+        # Best tag reachable from every DFA state, by fixpoint
+        reach = list(tags)
+        changed = True
+        while changed:
+            changed = False
+            for state in range(dfa.num_states):
+                for next_state in dfa.table[state * width:(state + 1) * width]:
+                    if next_state != DEAD and reach[next_state] < reach[state]:
+                        reach[state] = reach[next_state]
+                        changed = True
+
+        start = (0, no_tag)
+        ids = {start: 0}
+        order = [start]
+        moves = []
+        for state, best in order:
+            row = []
+            for next_state in dfa.table[state * width:(state + 1) * width]:
+                if next_state == DEAD or reach[next_state] > best:
+                    row.append(None)
+                    continue
+                target = (next_state, min(best, tags[next_state]))
+                if target not in ids:
+                    ids[target] = len(order)
+                    order.append(target)
+                row.append(target)
+            moves.append(row)
+
+        # Renumber with the accepting states last, and among them the ones
+        # with no moves out (a token that cannot get longer, like "(" or a
+        # whole keyword) at the very end. Every state is stored as its row
+        # offset in one flat table, so the scanning loop needs a single
+        # lookup and a comparison or two per character.
+        accepting = [tags[state] == best != no_tag for state, best in order]
+        final = [accepting[i] and all(target is None for target in moves[i]) for i in range(len(order))]
+        numbering = sorted(range(len(order)), key=lambda i: (accepting[i], final[i], i))
+        offset = {order[i]: new * width for new, i in enumerate(numbering)}
+        self.width = width
+        self.first_accepting = accepting.count(False) * width
+        self.first_final = (len(order) - final.count(True)) * width
+        self.table = [DEAD] * (len(order) * width)
+        self.tag_at = [no_tag] * (len(order) * width)
+        for i, (state, best) in enumerate(order):
+            base = offset[order[i]]
+            self.tag_at[base] = best
+            for column, target in enumerate(moves[i]):
+                if target is not None:
+                    self.table[base + column] = offset[target]
+
+    def scan(self, text):
+        # UTF-8 bytes mapped to class numbers; any byte of a non-ASCII
+        # character is outside the table, so its offset is also a character
+        # offset: nothing after it is ever scanned
+        codes = text.encode('utf-8').translate(self.class_of)
+        table, first_accepting, first_final, tag_at = self.table, self.first_accepting, self.first_final, self.tag_at
+        token_types = self.token_types
+        converters = [CONVERTERS.get(token_type) for token_type in token_types]
+        n = len(codes)
+        pos = 0
+        while pos < n:
+            state = 0
+            last = -1
+            for i in range(pos, n):
+                state = table[state + codes[i]]
+                if state < 0:
+                    break
+                if state >= first_accepting:
+                    last = state
+                    end = i + 1
+                    if state >= first_final:
+                        break
+            if last < 0:
+                raise LexError(f"Invalid token at position {pos}: '{text[pos:]}'", pos)
+            tag = tag_at[last]
+            if tag:
+                value = text[pos:end]
+                convert = converters[tag]
+                yield Token(token_types[tag], convert(value) if convert else value, pos, end)
+            pos = end
+
+    def tokenize(self, text):
+        return list(self.scan(text))
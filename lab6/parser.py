@@ -4,7 +4,9 @@ from enum import Enum
 # AST Nodes
 
 class ASTNode:
-    pass
+    # Offsets of the node's first and last token in the input, when known
+    start = None
+    end = None
 
 class NumberNode(ASTNode):
     def __init__(self, value):
@@ -53,6 +55,7 @@ class Parser:
         nodes = []
         while self.current_token() is not None:
             token = self.current_token()
+            count = len(nodes)
 
             if token.type in {
                 TokenType.RECTANGLE, TokenType.SQUARE, TokenType.CIRCLE,
@@ -74,6 +77,10 @@ class Parser:
                 print("Unknown node type", token)
                 self.pos += 1  # skip unknown
 
+            if len(nodes) > count:
+                nodes[-1].start = token.start
+                nodes[-1].end = self.tokens[self.pos - 1].end
+
         return nodes
 
     def parse_shape(self):